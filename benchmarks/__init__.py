@@ -0,0 +1,4 @@
+'''
+    Throughput benchmarks of the normalization library on synthetic data, no timeseries db required.
+    Run with: python -m benchmarks.run_benchmarks --output results.json
+'''
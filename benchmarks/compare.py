@@ -0,0 +1,41 @@
+import sys
+import json
+import argparse
+from typing import List, Optional
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> List[str]:
+    '''
+        Prints the ratio of the minimal time of every benchmark in both result files,
+        returns the names of the benchmarks slower than threshold times the baseline.
+    '''
+    with open(baseline_path) as fp:
+        baseline = json.load(fp)["results"]
+    with open(current_path) as fp:
+        current = json.load(fp)["results"]
+
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        ratio = current[name]["min"] / baseline[name]["min"] if baseline[name]["min"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f'{name:<70} {baseline[name]["min"]:>12.6f}s {current[name]["min"]:>12.6f}s {ratio:>7.2f}x{flag}')
+    for name in sorted(set(baseline) ^ set(current)):
+        print(f'{name:<70} only in {baseline_path if name in baseline else current_path}')
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="compares two run_benchmarks result files")
+    parser.add_argument("baseline", help="result file of the reference run")
+    parser.add_argument("current", help="result file of the run to check")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+    regressions = compare(args.baseline, args.current, args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import sys
+import json
+import argparse
+import datetime
+import platform
+import statistics
+import subprocess
+from typing import Dict, List, Optional
+
+# statements timed in a fresh interpreter, the light ones must not load HEAVY_MODULES
+IMPORTS = {
+    "import_package": ("import dw_normalization_lib", True),
+    "import_config": ("from dw_normalization_lib import Filters, Normalization_config, LibConstants, Supported_Normalized_calcs", True),
+    "import_client": ("from dw_normalization_lib import Normalization_client", False),
+}
+HEAVY_MODULES = ("pandas", "numpy", "numba", "pyarrow", "dw_timeseries_lib")
+
+SCRIPT = '''
+import sys, time, json
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def time_import(statement: str, repeat: int) -> Dict:
+    '''
+        Runs statement in repeat fresh interpreters, returns the minimal and median time and the heavy modules it loaded.
+    '''
+    seconds = []
+    modules = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(statement=statement, heavy=HEAVY_MODULES)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        seconds.append(result["seconds"])
+        modules = result["modules"]
+    return {"min": min(seconds), "median": statistics.median(seconds), "repeat": repeat, "heavy_modules": modules}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="cold import time of normalization-lib")
+    parser.add_argument("--output", help="JSON file the results are written to, stdout if not set")
+    parser.add_argument("--repeat", type=int, default=10, help="fresh interpreters per statement")
+    args = parser.parse_args(argv)
+
+    results = {}
+    failures = []
+    for name, (statement, light) in IMPORTS.items():
+        results[name] = time_import(statement, args.repeat)
+        print(f'{name}: {results[name]["min"]:.6f}s, heavy modules: {", ".join(results[name]["heavy_modules"]) or "none"}', file=sys.stderr)
+        if light and results[name]["heavy_modules"]:
+            failures.append(name)
+
+    report = {
+        "metadata": {
+            "created": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results
+    }
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fp:
+            fp.write(encoded)
+    else:
+        print(encoded)
+    if failures:
+        print(f'{", ".join(failures)} loaded heavy modules', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
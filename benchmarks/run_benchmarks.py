@@ -0,0 +1,139 @@
+import sys
+import json
+import time
+import argparse
+import warnings
+import datetime
+import platform
+import statistics
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dw_normalization_lib import (
+    Normalization_client, Normalization_config, Memory_db_client, Filters,
+    Supported_Normalized_calcs, Supported_calculation_engines, __version__
+)
+from dw_normalization_lib.normalization_client import CALCULATION_ENGINES
+from dw_normalization_lib.normalization_calculation import Calculation_plan, CALCULATION_GRAPH
+from benchmarks.synthetic_data import generate_system_data
+
+SIZES = (1_000, 100_000, 1_000_000)
+START = datetime.datetime(2022, 1, 1)
+SYSTEM_ID = "benchmark"
+CALCULATIONS = [calc for calc in Supported_Normalized_calcs if calc.value in CALCULATION_GRAPH]
+FILTERS = Filters(
+    reject_conductivity_low=1, reject_conductivity_high=18,
+    feed_flow_low=90, feed_flow_high=140,
+    recovery_low=30, recovery_high=95
+)
+
+
+def measure(function: Callable, repeat: int, setup: Optional[Callable] = None) -> Dict[str, float]:
+    '''
+        Runs function repeat times, setup is run before every call and not timed, its result is passed to function.
+    '''
+    seconds = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        function(*args)
+        seconds.append(time.perf_counter() - start)
+    return {"min": min(seconds), "median": statistics.median(seconds), "repeat": repeat}
+
+
+def benchmark_calculations(df: pd.DataFrame, baseline_df: pd.DataFrame, engine: Supported_calculation_engines, repeat: int):
+    calculation_client = CALCULATION_ENGINES[engine]()
+    for calculation in CALCULATIONS:
+        plan = Calculation_plan([calculation])
+        baseline = plan.baseline_values(baseline_df, calculation_client)
+        yield f'calculation.{calculation.value}', measure(
+            lambda frame: plan.execute(frame, calculation_client, baseline), repeat, setup=df.copy)
+
+
+def benchmark_system(db_client: Memory_db_client, rows: int, group: int, engine: Supported_calculation_engines, repeat: int):
+    config = Normalization_config(
+        1, SYSTEM_ID, group, START, START + datetime.timedelta(seconds=rows * group), CALCULATIONS, filters=FILTERS)
+    baseline_timestamp = START + datetime.timedelta(seconds=rows * group // 2)
+
+    def baseline_from_timestamp():
+        Normalization_client(db_client, config, engine=engine).baseline_from_timestamp(baseline_timestamp)
+    yield "baseline_from_timestamp", measure(baseline_from_timestamp, repeat)
+
+    client = Normalization_client(db_client, config, engine=engine)
+    client.add_baseline(client.baseline_from_timestamp(baseline_timestamp))
+    yield "get_normalization", measure(client.get_normalization, repeat)
+
+
+def run(sizes: List[int], engines: List[Supported_calculation_engines], repeat: int, row_wise_max_rows: int, group: int) -> Dict:
+    results = {}
+    for rows in sizes:
+        df = generate_system_data(START, rows, group)
+        baseline_df = df.drop(columns="Time").iloc[[rows // 2]].reset_index(drop=True)
+        db_client = Memory_db_client({SYSTEM_ID: df})
+
+        record(results, f'filters.mask[{rows}]', measure(lambda: FILTERS.mask(df), repeat), rows)
+
+        for engine in engines:
+            if engine == Supported_calculation_engines.ROW_WISE and rows > row_wise_max_rows:
+                continue
+            benchmarks = [
+                benchmark_calculations(df.drop(columns="Time"), baseline_df, engine, repeat),
+                benchmark_system(db_client, rows, group, engine, repeat)
+            ]
+            for benchmark in benchmarks:
+                for name, result in benchmark:
+                    record(results, f'{name}[{engine.value},{rows}]', result, rows)
+    return results
+
+
+def record(results: Dict, name: str, result: Dict[str, float], rows: int):
+    result["rows"] = rows
+    result["rows_per_second"] = rows / result["min"] if result["min"] else None
+    results[name] = result
+    print(f'{name}: {result["min"]:.6f}s', file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="normalization-lib throughput benchmarks on synthetic data")
+    parser.add_argument("--output", help="JSON file the results are written to, stdout if not set")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="row counts")
+    parser.add_argument(
+        "--engines", nargs="+", default=[Supported_calculation_engines.VECTORIZED.value],
+        choices=[engine.value for engine in Supported_calculation_engines]
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the minimum is compared")
+    parser.add_argument(
+        "--row-wise-max-rows", type=int, default=100_000, help="larger sizes are skipped for the row_wise engine")
+    parser.add_argument("--group", type=int, default=10, help="seconds between samples")
+    args = parser.parse_args(argv)
+    # the row-wise engine warns on every division by zero it maps to 0
+    warnings.simplefilter("ignore", RuntimeWarning)
+
+    results = run(
+        args.sizes, [Supported_calculation_engines(engine) for engine in args.engines],
+        args.repeat, args.row_wise_max_rows, args.group
+    )
+    report = {
+        "metadata": {
+            "created": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "version": __version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "results": results
+    }
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fp:
+            fp.write(encoded)
+    else:
+        print(encoded)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from dw_normalization_lib.constants import LibConstants
+
+CC_SECONDS = 25 * 60  # closed circuit phase of a CCRO sequence
+PF_SECONDS = 3 * 60  # plug flow phase, the brine is flushed
+
+
+def generate_system_data(
+    start: datetime.datetime,
+    rows: int,
+    group: int = LibConstants.DEFAULT_GROUP,
+    seed: int = 0,
+    gap_probability: float = 0.001,
+    max_gap: int = 30
+) -> pd.DataFrame:
+    '''
+        Generates raw data of a CCRO system, one sample per group seconds for every tag in LibConstants.BASELINE_TAGS,
+        columns named by tag as expected by Memory_db_client.
+        The system alternates closed circuit (CC) phases, where Last_CCD_VR ramps up and the brine concentrates,
+        with short plug flow (PF) phases, where Last_CCD_VR drops and the feed flow rises.
+        Parameters:
+            start: datetime.datetime
+                time of the first sample, naive is UTC
+            rows: int
+                number of samples
+            seed: int
+                seed of the random generator, the same seed returns the same data
+            gap_probability: float
+                probability per sample and tag that a gap of missing values starts
+            max_gap: int
+                maximal length in samples of a gap
+        Returns:
+            pd.DataFrame
+                Time as UTC timestamps and one float column per tag
+    '''
+    rng = np.random.default_rng(seed)
+    seconds = np.arange(rows, dtype=np.int64) * group
+    time = pd.Timestamp(start)
+    time = time.tz_localize("UTC") if time.tzinfo is None else time.tz_convert("UTC")
+
+    def noise(scale):
+        return rng.normal(0, scale, rows)
+
+    cycle = seconds % (CC_SECONDS + PF_SECONDS)
+    cc = cycle < CC_SECONDS
+    progress = np.where(cc, cycle / CC_SECONDS, 0)  # 0 to 1 during a CC phase
+    day = 2 * np.pi * seconds / 86_400
+
+    tt1 = 75 + 10 * np.sin(day) + noise(0.3)  # °F, crosses 25 °C daily
+    fit1 = np.where(cc, 100, 130) + noise(1.5)  # gpm
+    fit3 = fit1 * np.where(cc, 0.97, 0.6) + noise(0.5)
+    fit2 = 30 + noise(1)
+    cit1 = 1_000 + 100 * np.sin(day / 7) + noise(10)  # µS/cm
+    cit2 = np.where(cc, 2 + 14 * progress, 1.5) + noise(0.2)  # mS/cm, the brine concentrates during CC
+    cit3 = 15 + 10 * progress + noise(1)
+    pt2 = 120 + 6 * cit2 + noise(2)  # psi
+    pt3 = pt2 - 8 + noise(0.5)
+    pt7 = 10 + noise(0.3)
+
+    data = {
+        "AIT1": 7.2 + noise(0.05),
+        "CIT1": cit1,
+        "CIT2": cit2,
+        "CIT3": cit3,
+        "FIT1": fit1,
+        "FIT2": fit2,
+        "FIT3": fit3,
+        "Last_CCD_VR": np.where(cc, 40 + 52 * progress, 5) + noise(0.5),  # %
+        "M_DP": pt2 - pt3,
+        "PT2": pt2,
+        "PT3": pt3,
+        "PT7": pt7,
+        "TT1": tt1,
+        LibConstants.FILTER_RECOVERY: np.full(rows, 90.0),
+    }
+    for values in data.values():
+        add_gaps(values, rng, gap_probability, max_gap)
+
+    df = pd.DataFrame({"Time": time + pd.to_timedelta(seconds, unit="s")})
+    for tag in LibConstants.BASELINE_TAGS:
+        df[tag] = data[tag]
+    return df
+
+
+def add_gaps(values: np.ndarray, rng: Optional[np.random.Generator], probability: float, max_gap: int):
+    '''
+        Sets random runs of values to NaN in place, like the outages of a real data logger.
+    '''
+    if rng is None:
+        rng = np.random.default_rng()
+    starts = np.flatnonzero(rng.random(len(values)) < probability)
+    if not len(starts):
+        return
+    lengths = rng.integers(1, max_gap + 1, len(starts))
+    # +1 at every gap start and -1 after its end, the cumulative sum is positive inside a gap
+    edges = np.zeros(len(values) + 1, dtype=np.int64)
+    np.add.at(edges, starts, 1)
+    np.add.at(edges, np.minimum(starts + lengths, len(values)), -1)
+    values[np.cumsum(edges[:-1]) > 0] = np.nan
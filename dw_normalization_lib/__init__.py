@@ -1,21 +1,92 @@
 import logging
+import importlib
 from logging import NullHandler
+from typing import TYPE_CHECKING
 
-from .normalization_client import Normalization_client
-from .constants import LibConstants, Supported_Normalized_calcs
+from .constants import LibConstants, Supported_Normalized_calcs, Supported_calculation_engines, Supported_export_formats
 BASELINE_DEFAULT_TAG_MAP = LibConstants.BASELINE_DEFAULT_TAG_MAP
-from .objects import Filters, Normalization_config
+from .objects import Filters, Normalization_config, Baseline, Normalization_request
 from ._version import __version__
 
 __author__ = "DuPont W&P IT Team"
 __version__ = __version__
 
+# public names imported on first access, so importing the package does not load pandas, numpy or dw_timeseries_lib
+_LAZY_IMPORTS = {
+    "Normalization_client": ".normalization_client",
+    "Fleet_normalizer": ".fleet_normalizer",
+    "Fleet_result": ".fleet_normalizer",
+    "Parallel_executor": ".parallel_executor",
+    "Baseline_cache": ".baseline_cache",
+    "Sqlite_baseline_store": ".baseline_cache",
+    "Intermediate_cache": ".intermediate_cache",
+    "Cached_db_client": ".cached_timeseries_client",
+    "Memory_db_client": ".memory_timeseries_client",
+    "Async_memory_db_client": ".memory_timeseries_client",
+    "File_db_client": ".file_timeseries_client",
+    "Async_normalization_client": ".async_normalization_client",
+    "Single_flight_client": ".single_flight",
+    "Filter_scenarios": ".objects.filter_scenarios",
+    "Instrumentation": ".instrumentation",
+    "Logging_sink": ".instrumentation",
+    "Stage_metrics": ".instrumentation",
+    "Memory_peak": ".instrumentation",
+}
+
+if TYPE_CHECKING:
+    from .normalization_client import Normalization_client
+    from .fleet_normalizer import Fleet_normalizer, Fleet_result
+    from .parallel_executor import Parallel_executor
+    from .baseline_cache import Baseline_cache, Sqlite_baseline_store
+    from .intermediate_cache import Intermediate_cache
+    from .cached_timeseries_client import Cached_db_client
+    from .memory_timeseries_client import Memory_db_client, Async_memory_db_client
+    from .file_timeseries_client import File_db_client
+    from .async_normalization_client import Async_normalization_client
+    from .single_flight import Single_flight_client
+    from .objects.filter_scenarios import Filter_scenarios
+    from .instrumentation import Instrumentation, Logging_sink, Stage_metrics, Memory_peak
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
+
 __all__ = (
-    Normalization_client,
-    BASELINE_DEFAULT_TAG_MAP,
-    Supported_Normalized_calcs,
-    Filters,
-    Normalization_config
+    "Normalization_client",
+    "Fleet_normalizer",
+    "Fleet_result",
+    "Parallel_executor",
+    "Baseline_cache",
+    "Sqlite_baseline_store",
+    "Intermediate_cache",
+    "Cached_db_client",
+    "Memory_db_client",
+    "Async_memory_db_client",
+    "File_db_client",
+    "Async_normalization_client",
+    "Single_flight_client",
+    "BASELINE_DEFAULT_TAG_MAP",
+    "Supported_Normalized_calcs",
+    "Supported_calculation_engines",
+    "Supported_export_formats",
+    "Filters",
+    "Normalization_config",
+    "Baseline",
+    "Normalization_request",
+    "Filter_scenarios",
+    "Instrumentation",
+    "Logging_sink",
+    "Stage_metrics",
+    "Memory_peak"
 )
 
 # Set default logging handler to avoid "No handler found" warnings.
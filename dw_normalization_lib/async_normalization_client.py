@@ -0,0 +1,138 @@
+import asyncio
+import inspect
+import logging
+import weakref
+import datetime
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Dict, Union, Optional
+
+import pandas as pd
+
+from dw_normalization_lib.normalization_client import Normalization_client
+from dw_normalization_lib.constants import Supported_calculation_engines
+from dw_normalization_lib.objects.normalization_config import Normalization_config
+from dw_normalization_lib.objects.baseline import Baseline
+from dw_normalization_lib.baseline_cache import Baseline_cache
+
+log = logging.getLogger(__name__)
+
+
+class Async_normalization_client:
+    engine: Supported_calculation_engines
+    max_concurrency: int
+    baseline_cache: Union[Baseline_cache, None] = None
+
+    def __init__(
+        self,
+        timeseries_client,
+        engine: Supported_calculation_engines = Supported_calculation_engines.VECTORIZED,
+        max_concurrency: int = 10,
+        executor: Optional[Executor] = None,
+        baseline_cache: Optional[Baseline_cache] = None
+    ) -> None:
+        """
+            asyncio version of Normalization_client, the configuration is passed per call so a single instance serves many systems.
+            Parameters:
+                timeseries_client
+                    a Db_client, or a client with a coroutine get_data like Async_memory_db_client.
+                    get_data of a Db_client is run on a thread, a coroutine get_data is awaited
+                engine: Supported_calculation_engines
+                    calculation engine
+                max_concurrency: int
+                    maximal number of timeseries db requests in flight per event loop
+                executor: Optional[Executor] = None
+                    executor for the calculations and for a blocking get_data. A blocking get_data holds a worker for the
+                    whole request, so at most as many requests as the executor has workers are in flight.
+                    If None, the calculations run on the loop's default executor and a blocking get_data on a thread pool
+                    of max_concurrency workers owned by the client
+                baseline_cache: Optional[Baseline_cache] = None
+                    cache for baseline_from_timestamp results
+        """
+        self.timeseries_client = timeseries_client
+        self.engine = engine
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self.baseline_cache = baseline_cache
+        self._get_data_executor = executor
+        if executor is None and not inspect.iscoroutinefunction(timeseries_client.get_data):
+            self._get_data_executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="normalization_get_data")
+        # a semaphore is bound to the loop it is first used on, one per event loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+
+    async def baseline_from_timestamp(
+        self, normalization_config: Normalization_config, timestamp: datetime.datetime
+    ) -> Baseline:
+        client = self.__client(normalization_config)
+        baseline = client.cached_baseline(timestamp)
+        if baseline is not None:
+            return baseline
+
+        res_measurment = await self.__get_data([client.baseline_measurement(timestamp)])
+        baseline = await self.__run(client.baseline_from_df, res_measurment[0].data, timestamp)
+        client.cache_baseline(timestamp, baseline)
+        return baseline
+
+    async def get_normalization(
+        self,
+        normalization_config: Normalization_config,
+        baseline: Dict[str, float],
+        tags: Optional[List[str]] = None
+    ) -> Union[pd.DataFrame, None]:
+        '''
+            Same as Normalization_client.get_normalization, the data is awaited and the calculation runs on the executor.
+        '''
+        client = self.__client(normalization_config)
+        client.add_baseline(baseline)
+        client.tags = tags
+        res_measurment = await self.__get_data([client.normalization_measurement()])
+        df = client.validate_timeseries_df(res_measurment[0].data)
+        return await self.__run(client.normalization_from_df, df)
+
+    async def get_normalization_many(
+        self,
+        configs: List[Normalization_config],
+        baselines: List[Union[Dict[str, float], datetime.datetime]],
+        tags: Optional[List[str]] = None,
+        return_exceptions: bool = False
+    ) -> List[Union[pd.DataFrame, None, BaseException]]:
+        '''
+            Normalizes many configs concurrently, at most max_concurrency timeseries db requests are in flight.
+            Parameters:
+                baselines: List[Union[Dict[str, float], datetime.datetime]]
+                    per config a baseline, or the timestamp to fetch the baseline for
+                return_exceptions: bool = False
+                    return the exception of a failed config in its place instead of raising it
+            Returns:
+                the results in the order of configs
+        '''
+        if len(configs) != len(baselines):
+            raise ValueError(f'{len(configs)} configs were passed with {len(baselines)} baselines')
+
+        async def normalize(config, baseline):
+            if isinstance(baseline, datetime.datetime):
+                baseline = await self.baseline_from_timestamp(config, baseline)
+            return await self.get_normalization(config, baseline, tags)
+
+        return await asyncio.gather(
+            *[normalize(config, baseline) for config, baseline in zip(configs, baselines)],
+            return_exceptions=return_exceptions
+        )
+
+    def __client(self, normalization_config: Normalization_config) -> Normalization_client:
+        return Normalization_client(
+            self.timeseries_client, normalization_config, engine=self.engine, baseline_cache=self.baseline_cache)
+
+    async def __get_data(self, measurments):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            if inspect.iscoroutinefunction(self.timeseries_client.get_data):
+                return await self.timeseries_client.get_data(measurments)
+            return await loop.run_in_executor(self._get_data_executor, self.timeseries_client.get_data, measurments)
+
+    async def __run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
@@ -0,0 +1,153 @@
+import abc
+import json
+import logging
+import sqlite3
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+from dw_normalization_lib.constants import LibConstants
+
+log = logging.getLogger(__name__)
+
+Baseline_key = Tuple[str, str, str]
+
+
+def baseline_key(systemId: str, mapping: Dict[str, str], timestamp: datetime.datetime) -> Baseline_key:
+    '''
+        Returns the cache key of a baseline: the systemId, the mapping of the baseline tags and the timestamp in UTC.
+        Naive timestamps are treated as UTC, like in baseline_from_timestamp.
+    '''
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    resolved_mapping = json.dumps({tag: mapping.get(tag) for tag in LibConstants.BASELINE_TAGS}, sort_keys=True)
+    return (systemId, resolved_mapping, timestamp.isoformat())
+
+
+class Baseline_store(abc.ABC):
+    '''
+        Interface of the persistent store behind a Baseline_cache.
+        A store which does not implement every method cannot be instantiated.
+    '''
+    @abc.abstractmethod
+    def get(self, key: Baseline_key) -> Union[Dict[str, float], None]:
+        '''
+            Returns the stored baseline of key, None if key is not stored.
+        '''
+
+    @abc.abstractmethod
+    def set(self, key: Baseline_key, baseline: Dict[str, float]):
+        '''
+            Stores baseline under key, replacing a previous value.
+        '''
+
+    @abc.abstractmethod
+    def invalidate(self, systemId: Optional[str] = None):
+        '''
+            Removes the baselines of systemId, or every baseline if systemId is None.
+        '''
+
+
+class Sqlite_baseline_store(Baseline_store):
+    '''
+        Stores baselines as JSON in a SQLite database file.
+    '''
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS baselines ('
+                'systemId TEXT, mapping TEXT, timestamp TEXT, baseline TEXT, '
+                'PRIMARY KEY (systemId, mapping, timestamp))'
+            )
+
+    def get(self, key: Baseline_key) -> Union[Dict[str, float], None]:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT baseline FROM baselines WHERE systemId = ? AND mapping = ? AND timestamp = ?', key
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: Baseline_key, baseline: Dict[str, float]):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO baselines VALUES (?, ?, ?, ?)', (*key, json.dumps(baseline))
+            )
+
+    def invalidate(self, systemId: Optional[str] = None):
+        with self._lock, self._connection:
+            if systemId is None:
+                self._connection.execute('DELETE FROM baselines')
+            else:
+                self._connection.execute('DELETE FROM baselines WHERE systemId = ?', (systemId,))
+
+    def close(self):
+        self._connection.close()
+
+
+class Baseline_cache:
+    '''
+        In memory LRU cache of baseline_from_timestamp results, optionally backed by a persistent Baseline_store.
+        Counters:
+            hits: baselines served from memory
+            store_hits: baselines served from the store
+            misses: baselines found in neither
+    '''
+    def __init__(self, max_size: int = 1024, store: Optional[Baseline_store] = None) -> None:
+        self.max_size = max_size
+        self.store = store
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self._baselines: "OrderedDict[Baseline_key, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Baseline_key) -> Union[Dict[str, float], None]:
+        with self._lock:
+            if key in self._baselines:
+                self._baselines.move_to_end(key)
+                self.hits += 1
+                return dict(self._baselines[key])
+
+        baseline = self.store.get(key) if self.store else None
+        with self._lock:
+            if baseline is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+            self.__put(key, baseline)
+        return dict(baseline)
+
+    def set(self, key: Baseline_key, baseline: Dict[str, float]):
+        with self._lock:
+            self.__put(key, dict(baseline))
+        if self.store:
+            self.store.set(key, baseline)
+
+    def invalidate(self, systemId: Optional[str] = None):
+        '''
+            Removes the cached baselines of systemId, or every cached baseline if systemId is None.
+        '''
+        with self._lock:
+            if systemId is None:
+                self._baselines.clear()
+            else:
+                for key in [key for key in self._baselines if key[0] == systemId]:
+                    del self._baselines[key]
+        if self.store:
+            self.store.invalidate(systemId)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "store_hits": self.store_hits, "misses": self.misses, "size": len(self._baselines)}
+
+    def __put(self, key: Baseline_key, baseline: Dict[str, float]):
+        self._baselines[key] = baseline
+        self._baselines.move_to_end(key)
+        while len(self._baselines) > self.max_size:
+            self._baselines.popitem(last=False)
@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import datetime
+import threading
+from typing import List, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from dw_timeseries_lib import Db_client, Measurement
+
+log = logging.getLogger(__name__)
+
+SUPPORTED_FILE_FORMATS = ("parquet", "feather")
+
+
+class Cached_db_client:
+    '''
+        Read-through cache in front of a Db_client, it implements get_data and can be passed to Normalization_client
+        in place of the wrapped client.
+
+        The data of every tag is stored per fixed time chunk (a day by default) in a local parquet or feather file.
+        A measurement is served from the cached chunks, only the chunks which are missing are fetched from the
+        wrapped client, one get_data call per run of consecutive chunks missing the same tags.
+        A chunk file written before the end of its chunk may be incomplete, it is fetched again once it is older than ttl,
+        a chunk file written after the end of its chunk is final.
+        The files are evicted least recently used first when the directory exceeds max_bytes.
+
+        Measurement windows are interpreted in the timezone of the measurement. Chunks are aligned to multiples of chunk
+        since the epoch in UTC, whatever the window of the request, so overlapping requests share their chunk files.
+        chunk should be a multiple of the measurement group, so that a bucket never spans two chunks.
+        Like the wrapped client, a measurement returns the bucket containing its start, with the data of the whole bucket.
+    '''
+    def __init__(
+        self,
+        timeseries_client: Db_client,
+        directory: str,
+        chunk: datetime.timedelta = datetime.timedelta(days=1),
+        ttl: datetime.timedelta = datetime.timedelta(minutes=5),
+        max_bytes: int = 1024 ** 3,
+        file_format: str = "parquet"
+    ) -> None:
+        """
+            Parameters:
+                timeseries_client: Db_client
+                    the client the data is fetched with on a cache miss
+                directory: str
+                    directory of the chunk files, created if missing
+                chunk: datetime.timedelta
+                    time span of a chunk
+                ttl: datetime.timedelta
+                    time after which a chunk that is not over yet is fetched again
+                max_bytes: int
+                    disk budget of the directory
+                file_format: str
+                    one of SUPPORTED_FILE_FORMATS, both require pyarrow
+        """
+        if file_format not in SUPPORTED_FILE_FORMATS:
+            raise ValueError(f'unsupported file format {file_format}, supported formats: {", ".join(SUPPORTED_FILE_FORMATS)}')
+        self.timeseries_client = timeseries_client
+        self.directory = directory
+        self.chunk = chunk
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.file_format = file_format
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get_data(self, measurements: List[Measurement]) -> List[Measurement]:
+        for measurement in measurements:
+            measurement.data = self.__measurement_df(measurement)
+        self.__evict()
+        return measurements
+
+    def invalidate(self):
+        '''
+            Removes every cached chunk.
+        '''
+        with self._lock:
+            for path in self.__chunk_files():
+                os.remove(path)
+
+    def __measurement_df(self, measurement: Measurement) -> pd.DataFrame:
+        chunk_starts = self.__chunk_starts(measurement)
+
+        missing: Dict[datetime.datetime, List[str]] = {}
+        for chunk_start in chunk_starts:
+            for name, tag in measurement.tags.items():
+                if not self.__is_fresh(self.__chunk_path(measurement, tag, chunk_start), measurement, chunk_start):
+                    missing.setdefault(chunk_start, []).append(name)
+        n_missing = sum(len(names) for names in missing.values())
+        with self._lock:
+            self.hits += len(chunk_starts) * len(measurement.tags) - n_missing
+            self.misses += n_missing
+
+        # the fetched chunks are used as they are, they are not read back from their files
+        fetched: Dict[Tuple[str, datetime.datetime], pd.DataFrame] = {}
+        for range_starts, names in self.__fetch_ranges(measurement, chunk_starts, missing):
+            fetched.update(self.__fetch(measurement, names, range_starts))
+
+        # the bucket containing the start of the window is returned by the wrapped client as well
+        group = int(measurement.group) * 1_000_000_000
+        start = pd.Timestamp(self.__timestamp(measurement.start_datetime, measurement).value // group * group, tz="UTC")
+        end = self.__timestamp(measurement.end_datetime, measurement)
+        df = None
+        for name, tag in measurement.tags.items():
+            frames = []
+            for chunk_start in chunk_starts:
+                chunk_df = fetched.get((name, chunk_start))
+                if chunk_df is None:
+                    chunk_df = self.__read(self.__chunk_path(measurement, tag, chunk_start))
+                if chunk_df is None:
+                    # evicted by another thread since __is_fresh, a cache miss
+                    with self._lock:
+                        self.hits -= 1
+                        self.misses += 1
+                    chunk_df = self.__fetch(measurement, [name], [chunk_start])[(name, chunk_start)]
+                frames.append(chunk_df)
+            tag_df = pd.concat(frames, ignore_index=True)
+            times = pd.to_datetime(tag_df["Time"], utc=True)
+            tag_df = tag_df[(times >= start) & (times < end)].rename(columns={"value": name})
+            df = tag_df if df is None else df.merge(tag_df, on="Time", how="outer")
+
+        if df is None:
+            return pd.DataFrame(columns=["Time"])
+        df = df.iloc[pd.to_datetime(df["Time"], utc=True).argsort(kind="stable")]
+        return df.reset_index(drop=True)
+
+    def __fetch(
+        self, measurement: Measurement, names: List[str], chunk_starts: List[datetime.datetime]
+    ) -> Dict[Tuple[str, datetime.datetime], pd.DataFrame]:
+        '''
+            Fetches the tags names of consecutive chunks in one get_data call and writes a file per tag and chunk.
+            Returns the written frames by tag name and chunk start.
+            A tag the wrapped client returns no column for is written as an empty chunk.
+        '''
+        start_datetime, end_datetime = chunk_starts[0], self.__chunk_end(chunk_starts[-1], measurement)
+        log.debug(f'fetching {", ".join(names)} of system {measurement.systemId} from {start_datetime} to {end_datetime}')
+        fetch_measurment = Measurement(
+            measurement.name,
+            measurement.systemId,
+            {name: measurement.tags[name] for name in names},
+            measurement.group,
+            start_datetime,
+            end_datetime,
+            timezone=measurement.timezone,
+            db=measurement.db,
+            bucket=measurement.bucket
+        )
+        df = self.timeseries_client.get_data([fetch_measurment])[0].data
+        if df is None or df.empty:
+            df = pd.DataFrame(columns=["Time"] + names)
+        times = pd.to_datetime(df["Time"], utc=True)
+
+        fetched = {}
+        for chunk_start in chunk_starts:
+            in_chunk = (
+                (times >= self.__timestamp(chunk_start, measurement))
+                & (times < self.__timestamp(self.__chunk_end(chunk_start, measurement), measurement))
+            )
+            for name in names:
+                if name in df:
+                    chunk_df = df.loc[in_chunk, ["Time", name]].rename(columns={name: "value"}).reset_index(drop=True)
+                else:
+                    chunk_df = pd.DataFrame({"Time": pd.Series(dtype=object), "value": pd.Series(dtype=float)})
+                self.__write(self.__chunk_path(measurement, measurement.tags[name], chunk_start), chunk_df)
+                fetched[(name, chunk_start)] = chunk_df
+        return fetched
+
+    def __fetch_ranges(
+        self, measurement: Measurement, chunk_starts: List[datetime.datetime], missing: Dict[datetime.datetime, List[str]]
+    ) -> List[Tuple[List[datetime.datetime], List[str]]]:
+        '''
+            Merges consecutive chunks missing the same tags into a single fetch.
+        '''
+        ranges = []
+        for i, chunk_start in enumerate(chunk_starts):
+            names = missing.get(chunk_start)
+            if not names:
+                continue
+            if ranges and ranges[-1][0][-1] == chunk_starts[i - 1] and ranges[-1][1] == names:
+                ranges[-1][0].append(chunk_start)
+            else:
+                ranges.append(([chunk_start], names))
+        return ranges
+
+    def __chunk_starts(self, measurement: Measurement) -> List[datetime.datetime]:
+        '''
+            Returns the starts of the chunks overlapping the window of measurement, multiples of chunk since the epoch
+            in UTC, as datetimes of the same kind as the start of the window, naive in the timezone of the measurement.
+        '''
+        chunk = pd.Timedelta(self.chunk).value
+        start = self.__timestamp(measurement.start_datetime, measurement).value // chunk * chunk
+        end = self.__timestamp(measurement.end_datetime, measurement).value
+        return [
+            self.__datetime(pd.Timestamp(chunk_start, tz="UTC"), measurement)
+            for chunk_start in range(start, end, chunk)
+        ]
+
+    def __chunk_end(self, chunk_start: datetime.datetime, measurement: Measurement) -> datetime.datetime:
+        return self.__datetime(self.__timestamp(chunk_start, measurement) + self.chunk, measurement)
+
+    def __chunk_path(self, measurement: Measurement, tag, chunk_start: datetime.datetime) -> str:
+        key = json.dumps([
+            measurement.systemId,
+            measurement.group,
+            measurement.db,
+            measurement.bucket,
+            measurement.timezone,
+            vars(tag),
+            chunk_start.isoformat(),
+            self.chunk.total_seconds()
+        ], sort_keys=True, default=str)
+        return os.path.join(self.directory, f'{hashlib.sha1(key.encode()).hexdigest()}.{self.file_format}')
+
+    def __is_fresh(self, path: str, measurement: Measurement, chunk_start: datetime.datetime) -> bool:
+        if not os.path.exists(path):
+            return False
+        modified = os.path.getmtime(path)
+        if pd.Timestamp(modified, unit="s", tz="UTC") >= self.__timestamp(chunk_start, measurement) + self.chunk:
+            return True  # fetched after the chunk was over, its data no longer changes
+        return time.time() - modified < self.ttl.total_seconds()
+
+    def __read(self, path: str) -> Union[pd.DataFrame, None]:
+        '''
+            Returns the chunk of path, None if the file was evicted or invalidated in the meantime.
+        '''
+        try:
+            # access time orders the files for eviction, modification time is the fetch time
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+            if self.file_format == "parquet":
+                return pd.read_parquet(path, memory_map=True)
+            return pd.read_feather(path)
+        except FileNotFoundError:
+            return None
+
+    def __write(self, path: str, df: pd.DataFrame):
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        if self.file_format == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_feather(tmp_path)
+        os.replace(tmp_path, path)
+
+    def __timestamp(self, dt: datetime.datetime, measurement: Measurement) -> pd.Timestamp:
+        timestamp = pd.Timestamp(dt)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize(measurement.timezone or "UTC")
+        return timestamp.tz_convert("UTC")
+
+    def __datetime(self, timestamp: pd.Timestamp, measurement: Measurement) -> datetime.datetime:
+        '''
+            Inverse of __timestamp, a naive datetime in the timezone of the measurement if its window is naive.
+        '''
+        start = measurement.start_datetime
+        if start.tzinfo is None:
+            return timestamp.tz_convert(measurement.timezone or "UTC").tz_localize(None).to_pydatetime()
+        return timestamp.tz_convert(start.tzinfo).to_pydatetime()
+
+    def __chunk_files(self) -> List[str]:
+        return [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith(f'.{self.file_format}')
+        ]
+
+    def __evict(self):
+        with self._lock:
+            files = [(os.stat(path), path) for path in self.__chunk_files()]
+            total = sum(stat.st_size for stat, _ in files)
+            for stat, path in sorted(files, key=lambda item: item[0].st_atime):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= stat.st_size
+                log.debug(f'evicted {path}')
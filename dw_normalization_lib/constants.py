@@ -1,9 +1,11 @@
 import enum
+import datetime
 
 class LibConstants:
     DEFAULT_NORMALIZATION_CLIENT_ID = 1
     DEFAULT_FUNCTION = "mean"
     DEFAULT_GROUP = 10  # 10 seconds
+    BASELINE_WINDOW = datetime.timedelta(minutes=30)  # baseline data is read within 30 minutes of the baseline timestamp
     DEFAULT_DB = 'test_DB'
     DEFAULT_BUCKET = "ccro-systems"
     FILTERS = ('Recovery', 'FeedFlow', 'RejectConductivity')
@@ -30,6 +32,7 @@ class LibConstants:
     FILTER_CONDUCTIVITY = 'Reject_Conductivity'
     FILTER_FEED_FLOW_LOW = 'Feed_flow_low'
     FILTER_FEED_FLOW_HIGH = 'Feed_flow_high'
+    FILTER_TAGS = ("Last_CCD_VR", "FIT1", "CIT2")  # raw tags the filters are applied on
     BASELINE_TAGS = (
         "AIT1",
         "CIT1",
@@ -81,4 +84,15 @@ class Supported_Normalized_calcs(enum.Enum):
         FLUX = 'normalized_flux'
         SALT_PASSAGE = 'normalized_salt_passage'
         SPECIFIC_FLUX = 'normalized_specific_flux'
-        SYSTEM_STATUS = 'system_status'
\ No newline at end of file
+        SYSTEM_STATUS = 'system_status'
+
+class Supported_calculation_engines(enum.Enum):
+        ROW_WISE = 'row_wise'
+        VECTORIZED = 'vectorized'
+        FUSED = 'fused'  # single compiled pass, requires numba, VECTORIZED otherwise
+
+class Supported_export_formats(enum.Enum):
+        ARROW = 'arrow'
+        PARQUET = 'parquet'
+        NUMPY = 'numpy'
+        JSON = 'json'
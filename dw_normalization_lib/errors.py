@@ -65,4 +65,12 @@ class No_timeseries_data_found(Exception):
             self.message = args[0]
         else:
             self.message = 'no time series data has been found for the selected system, tags and time window'
-        super().__init__(*args)
\ No newline at end of file
+        super().__init__(*args)
+
+class Duplicate_systemId(Exception):
+    def __init__(self, *args: object) -> None:
+        if args:
+            self.message = args[0]
+        else:
+            self.message = 'the same systemId is configured more than once'
+        super().__init__(*args)
@@ -0,0 +1,126 @@
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dw_timeseries_lib import Measurement
+from dw_normalization_lib.memory_timeseries_client import aggregate_measurement, measurement_time_bounds
+
+log = logging.getLogger(__name__)
+
+SUPPORTED_FILE_FORMATS = ("parquet", "csv")
+
+
+class File_db_client:
+    '''
+        Timeseries client over data exported from the timeseries db, for reprocessing historical data and load tests.
+        It implements get_data like Db_client and can be passed to Normalization_client in place of it.
+
+        The data of a system is read from <directory>/<systemId>.<file_format>, or from every <file_format> file
+        in the <directory>/<systemId>/ directory, e.g. one file per month.
+        A file has a Time column, timestamps or ISO strings (naive times are UTC), and a column per tag,
+        named by tagId as stored in the timeseries db or by tag name.
+        Only the columns of the measurement are read. Parquet files are memory mapped and, when Time is stored as
+        a timestamp, only the row groups of the measurement window are read.
+        The samples are aggregated like the db does, the mean per group seconds bucket, see aggregate_measurement.
+    '''
+    def __init__(self, directory: str, file_format: str = "parquet", memory_map: bool = True) -> None:
+        """
+            Parameters:
+                directory: str
+                    directory of the system files
+                file_format: str
+                    one of SUPPORTED_FILE_FORMATS, parquet requires pyarrow
+                memory_map: bool
+                    memory map the files instead of reading them into memory
+        """
+        if file_format not in SUPPORTED_FILE_FORMATS:
+            raise ValueError(f'unsupported file format {file_format}, supported formats: {", ".join(SUPPORTED_FILE_FORMATS)}')
+        self.directory = directory
+        self.file_format = file_format
+        self.memory_map = memory_map
+        self._schemas: Dict[str, Tuple[float, Dict[str, object]]] = {}
+
+    def get_data(self, measurements: List[Measurement]) -> List[Measurement]:
+        for measurement in measurements:
+            time, values = self.__read_measurement(measurement)
+            measurement.data = aggregate_measurement(time, values, measurement)
+        return measurements
+
+    def system_files(self, systemId: str) -> List[str]:
+        '''
+            Returns the data files of a system, an empty list if there are none.
+        '''
+        path = os.path.join(self.directory, f'{systemId}.{self.file_format}')
+        if os.path.isfile(path):
+            return [path]
+        path = os.path.join(self.directory, str(systemId))
+        if os.path.isdir(path):
+            return sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(f'.{self.file_format}'))
+        return []
+
+    def __read_measurement(self, measurement: Measurement) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        start, end = measurement_time_bounds(measurement)
+        times = []
+        values: Dict[str, list] = {name: [] for name in measurement.tags}
+        files = self.system_files(measurement.systemId)
+        if not files:
+            log.warning(f'no data files for system {measurement.systemId} in {self.directory}')
+
+        for path in files:
+            schema = self.__schema(path)
+            columns = {}
+            for name, tag in measurement.tags.items():
+                if tag.tagId in schema:
+                    columns[name] = tag.tagId
+                elif name in schema:
+                    columns[name] = name
+            df = self.__read(path, schema, sorted(set(columns.values())), start, end)
+            time = pd.to_datetime(df["Time"], utc=True).to_numpy(dtype="datetime64[ns]").view("int64")
+            in_window = (time >= start.value) & (time < end.value)
+            times.append(time[in_window])
+            for name in measurement.tags:
+                if name in columns:
+                    values[name].append(df[columns[name]].to_numpy(dtype=float, na_value=np.nan)[in_window])
+                else:
+                    values[name].append(np.full(in_window.sum(), np.nan))
+
+        if not times:
+            return np.empty(0, dtype="int64"), {}
+        time = np.concatenate(times)
+        order = np.argsort(time, kind="stable")
+        return time[order], {name: np.concatenate(arrays)[order] for name, arrays in values.items()}
+
+    def __read(self, path: str, schema: Dict[str, object], columns: List[str], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        if self.file_format == "csv":
+            return pd.read_csv(
+                path, usecols=["Time"] + columns, memory_map=self.memory_map, float_precision="round_trip")
+
+        filters = None
+        time_type = schema["Time"]
+        if getattr(time_type, "unit", None) is not None:  # pyarrow timestamp, the row groups are filtered
+            if time_type.tz is None:
+                start, end = start.tz_localize(None), end.tz_localize(None)
+            filters = [("Time", ">=", start), ("Time", "<", end)]
+        return pd.read_parquet(path, columns=["Time"] + columns, filters=filters, memory_map=self.memory_map)
+
+    def __schema(self, path: str) -> Dict[str, object]:
+        '''
+            Returns the column types of a file, pyarrow types for parquet, None for csv, cached until the file changes.
+        '''
+        mtime = os.path.getmtime(path)
+        cached = self._schemas.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        if self.file_format == "csv":
+            schema = {column: None for column in pd.read_csv(path, nrows=0).columns}
+        else:
+            import pyarrow.parquet as pq
+            schema = {field.name: field.type for field in pq.read_schema(path)}
+        if "Time" not in schema:
+            raise ValueError(f'{path} has no Time column')
+        self._schemas[path] = (mtime, schema)
+        return schema
@@ -0,0 +1,188 @@
+import pandas as pd
+import numpy as np
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Union, Optional
+
+from dw_timeseries_lib import Db_client
+
+from dw_normalization_lib.normalization_client import Normalization_client, CALCULATION_ENGINES
+from dw_normalization_lib.normalization_calculation.calculation_plan import Calculation_plan
+from dw_normalization_lib.constants import Supported_calculation_engines
+from dw_normalization_lib.objects.normalization_config import Normalization_config
+from dw_normalization_lib.parallel_executor import Job_failure
+from dw_normalization_lib.errors import Duplicate_systemId
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Fleet_result:
+    '''
+        results: the normalization result per systemId, in the order of the configs.
+            None if the system had no rows or failed
+        failures: the systems which failed, e.g. because no data was returned for them
+    '''
+    results: Dict[str, Union[pd.DataFrame, None]] = field(default_factory=dict)
+    failures: List[Job_failure] = field(default_factory=list)
+
+    def to_long_format(self) -> pd.DataFrame:
+        '''
+            Returns the results of all systems concatenated in a single frame with a systemId column.
+        '''
+        frames = []
+        for system_id, df in self.results.items():
+            if df is None:
+                continue
+            df = df.copy()
+            df.insert(0, "systemId", system_id)
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=["systemId"])
+        return pd.concat(frames, ignore_index=True)
+
+
+class Fleet_normalizer:
+    timeseries_client: Db_client
+    engine: Supported_calculation_engines
+    batch_size: Union[int, None] = None
+
+    def __init__(
+        self,
+        timeseries_client: Db_client,
+        engine: Supported_calculation_engines = Supported_calculation_engines.VECTORIZED,
+        batch_size: Optional[int] = None
+    ) -> None:
+        """
+            Normalizes many systems with as few timeseries db round trips as possible.
+            Parameters:
+                timeseries_client: Db_client
+                    used for making calls to influx
+                engine: Supported_calculation_engines
+                    calculation engine used for every system
+                batch_size: Optional[int] = None
+                    maximal number of measurements per get_data call, all measurements are sent in one call if None
+        """
+        self.timeseries_client = timeseries_client
+        self.engine = engine
+        self.batch_size = batch_size
+
+    def normalization_clients(
+        self,
+        configs: List[Normalization_config],
+        baselines: List[Dict[str, float]],
+        tags: Optional[List[str]] = None
+    ) -> List[Normalization_client]:
+        '''
+            Returns a normalization client with its baseline per config.
+            Raises:
+                Duplicate_systemId
+                    Iff two configs share the same systemId.
+        '''
+        if len(configs) != len(baselines):
+            raise ValueError(f'{len(configs)} configs were passed with {len(baselines)} baselines')
+
+        system_ids = [config.systemId for config in configs]
+        duplicates = sorted({system_id for system_id in system_ids if system_ids.count(system_id) > 1})
+        if duplicates:
+            msg = f'the following systemIds are configured more than once: {", ".join(duplicates)}'
+            log.error(msg)
+            raise Duplicate_systemId(msg)
+
+        clients = []
+        for config, baseline in zip(configs, baselines):
+            client = Normalization_client(self.timeseries_client, config, engine=self.engine)
+            client.add_baseline(baseline)
+            client.tags = tags
+            clients.append(client)
+        return clients
+
+    def fetch(self, clients: List[Normalization_client]) -> List[pd.DataFrame]:
+        '''
+            Fetches the normalization data of all clients, batch_size measurements per get_data call.
+            Returns the data frames in the order of the clients.
+        '''
+        measurments = [client.normalization_measurement() for client in clients]
+        batch_size = self.batch_size or len(measurments) or 1
+        data = []
+        for i in range(0, len(measurments), batch_size):
+            batch = measurments[i:i + batch_size]
+            log.debug(f'fetching {len(batch)} normalization measurements')
+            res_measurments = self.timeseries_client.get_data(batch)
+            data.extend([measurment.data for measurment in res_measurments])
+        return data
+
+    def get_normalization(
+        self,
+        configs: List[Normalization_config],
+        baselines: List[Dict[str, float]],
+        tags: Optional[List[str]] = None
+    ) -> Fleet_result:
+        '''
+            Normalizes every config against its baseline.
+            The data of all systems is fetched with as few get_data calls as batch_size allows, filtered per system,
+            and the calculation engine runs once on the rows of all systems combined, every row with the baseline
+            of its system. A system without data, or failing otherwise, is reported in failures and does not stop
+            the other systems.
+            Parameters:
+                configs: List[Normalization_config]
+                    one config per system
+                baselines: List[Dict[str, float]]
+                    the baseline of each config, in the same order as configs
+                tags: Optional[List[str]] = None
+                    additional system tags returned with every result
+            Returns:
+                Fleet_result
+                    the result of get_normalization per systemId and the failed systems,
+                    Fleet_result.to_long_format returns a single frame with a systemId column
+        '''
+        clients = self.normalization_clients(configs, baselines, tags)
+        fleet_result = Fleet_result({client.systemId: None for client in clients})
+        frames = []
+        for i, (client, df) in enumerate(zip(clients, self.fetch(clients))):
+            try:
+                df = client.numeric_df(client.validate_timeseries_df(df))
+            except Exception as error:
+                log.warning(f'normalization of system {client.systemId} failed: {error!r}')
+                fleet_result.failures.append(
+                    Job_failure(i, client.id, client.systemId, client.start_datetime, client.end_datetime, error))
+                continue
+            if df is not None:
+                frames.append((client, df))
+        if not frames:
+            return fleet_result
+
+        df = self.__calculate(frames)
+        start = 0
+        for client, system_df in frames:
+            end = start + len(system_df)
+            result = df.iloc[start:end][client.result_columns()].reset_index(drop=True)
+            fleet_result.results[client.systemId] = client.mask_filtered_rows(result, client.filter_mask(system_df))
+            start = end
+        return fleet_result
+
+    def __calculate(self, frames) -> pd.DataFrame:
+        '''
+            Runs the calculation plan of all systems on their rows concatenated.
+            The baselines of the systems are stacked in one frame and every row is computed with the baseline of its system.
+        '''
+        outputs = []
+        for client, _ in frames:
+            outputs.extend(name for name in client.calculation_plan().outputs if name not in outputs)
+        plan = Calculation_plan(outputs)
+
+        rows = []
+        offset = 0
+        for client, df in frames:
+            system_rows = client.baseline_rows(df)
+            if system_rows is None:
+                # a single baseline is the last row of the baseline frame
+                system_rows = np.full(len(df), len(client.baseline) - 1)
+            rows.append(system_rows + offset)
+            offset += len(client.baseline)
+        baseline_df = pd.concat([client.baseline for client, _ in frames], ignore_index=True)
+        baseline = plan.baseline_values(baseline_df, CALCULATION_ENGINES[self.engine](), np.concatenate(rows))
+
+        df = pd.concat([df for _, df in frames], ignore_index=True)
+        log.debug(f'Executing {plan!r} on {len(df)} rows of {len(frames)} systems')
+        return plan.execute(df, CALCULATION_ENGINES[self.engine](), baseline)
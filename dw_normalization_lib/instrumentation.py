@@ -0,0 +1,192 @@
+import time
+import logging
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+from typing import Callable, Deque, Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+_NO_STAGE = nullcontext()
+
+# tracemalloc is process wide, it is started and its peak is reset under _tracing_lock,
+# _tracing_threads counts the open measurements per thread
+_tracing_lock = threading.Lock()
+_tracing_threads: Dict[int, int] = {}
+_started_tracing = False
+
+
+def _start_tracing() -> int:
+    '''
+        Opens a memory measurement of the current thread, tracemalloc is started if it is not running.
+        The peak is reset unless another thread is measuring, then peaks include the memory of the other threads.
+        Returns the traced memory at the start of the measurement.
+    '''
+    global _started_tracing
+    with _tracing_lock:
+        if not _tracing_threads and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        thread = threading.get_ident()
+        _tracing_threads[thread] = _tracing_threads.get(thread, 0) + 1
+        if len(_tracing_threads) == 1:
+            tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _stop_tracing() -> int:
+    '''
+        Closes a memory measurement of the current thread, returns the traced peak.
+        tracemalloc is stopped with the last measurement if it was started by _start_tracing.
+    '''
+    global _started_tracing
+    with _tracing_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        thread = threading.get_ident()
+        _tracing_threads[thread] -= 1
+        if not _tracing_threads[thread]:
+            del _tracing_threads[thread]
+        if not _tracing_threads and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+        return peak
+
+
+@dataclass
+class Stage_metrics:
+    '''
+        Metrics of a single stage of a normalization.
+            name: stage name, e.g. fetch, filters, or the name of a calculated column
+            parent: name of the enclosing stage, None for a top level stage
+            seconds: wall time
+            rows: rows processed by the stage, None if unknown
+            peak_bytes: peak memory allocated above the memory at the start of the stage, None unless memory is traced
+    '''
+    name: str
+    parent: Optional[str] = None
+    seconds: float = 0.0
+    rows: Optional[int] = None
+    peak_bytes: Optional[int] = None
+
+
+class Logging_sink:
+    '''
+        Metrics sink writing every stage to a logger.
+    '''
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG) -> None:
+        self.logger = logger or log
+        self.level = level
+
+    def __call__(self, metrics: Stage_metrics):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        path = f'{metrics.parent}/{metrics.name}' if metrics.parent else metrics.name
+        peak = f', peak {metrics.peak_bytes} bytes' if metrics.peak_bytes is not None else ''
+        self.logger.log(self.level, f'stage {path}: {metrics.seconds:.6f}s, {metrics.rows} rows{peak}')
+
+
+class Instrumentation:
+    '''
+        Records wall time, row count and optionally peak memory of the stages of a normalization.
+        Pass an instance to Normalization_client, the metrics of every finished stage are appended to stages
+        and passed to every sink, a sink is any callable taking a Stage_metrics (see Logging_sink).
+        stages keeps the metrics of the last max_stages stages, older metrics are only seen by the sinks.
+        Nested stages, e.g. the columns of the calculation stage, are recorded before their parent.
+    '''
+    def __init__(
+        self,
+        sinks: Optional[List[Callable[[Stage_metrics], None]]] = None,
+        trace_memory: bool = False,
+        max_stages: Optional[int] = 10_000
+    ) -> None:
+        """
+            Parameters:
+                sinks: Optional[List[Callable[[Stage_metrics], None]]] = None
+                    called with the metrics of every finished stage
+                trace_memory: bool = False
+                    record peak memory with tracemalloc, which slows python allocations down noticeably.
+                    tracing is started by the first stage and stopped when the last measurement of any thread ends
+                    if it was not already running. Peaks of stages running while another thread measures memory
+                    include the allocations of that thread.
+                max_stages: Optional[int] = 10_000
+                    number of stage metrics kept in stages, so a long lived client does not grow without bound,
+                    all metrics are kept if None
+        """
+        self.sinks = list(sinks or [])
+        self.trace_memory = trace_memory
+        self.stages: Deque[Stage_metrics] = deque(maxlen=max_stages)
+        self._local = threading.local()
+
+    def add_sink(self, sink: Callable[[Stage_metrics], None]):
+        self.sinks.append(sink)
+
+    def reset(self):
+        '''
+            Drops the recorded stages.
+        '''
+        self.stages.clear()
+
+    def as_dicts(self) -> List[Dict]:
+        return [asdict(metrics) for metrics in self.stages]
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None):
+        '''
+            Context manager recording the stage name, yields the Stage_metrics, rows may be set on it within the block.
+        '''
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        metrics = Stage_metrics(name, stack[-1][0].name if stack else None, rows=rows)
+        start_memory = _start_tracing() if self.trace_memory else None
+        # [metrics, highest absolute peak of the finished nested stages]
+        frame = [metrics, 0]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.seconds = time.perf_counter() - start
+            stack.pop()
+            if start_memory is not None:
+                # nested stages reset the peak, their peaks are carried up the stack
+                peak = max(_stop_tracing(), frame[1])
+                metrics.peak_bytes = peak - start_memory
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], peak)
+            self.stages.append(metrics)
+            for sink in self.sinks:
+                sink(metrics)
+
+
+class Memory_peak:
+    '''
+        Context manager measuring the peak of the memory traced by tracemalloc within a block, above the traced memory
+        at its start. tracemalloc traces the allocations of the python allocators, numpy arrays included, it does not
+        measure resident memory: memory of libraries allocating outside of them (e.g. pyarrow buffers),
+        the interpreter itself and freed memory not yet returned to the operating system are not counted.
+        Tracing slows python allocations down, it is started if it is not running and stopped with the last measurement.
+        Measurements of several threads may overlap, the peak then includes the allocations of the other threads.
+        Instrumentation stages with trace_memory within the block reset the peak, use their peak_bytes instead.
+    '''
+    def __init__(self) -> None:
+        self.peak_bytes: Optional[int] = None
+        self._start_memory = 0
+
+    def __enter__(self) -> "Memory_peak":
+        self._start_memory = _start_tracing()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.peak_bytes = _stop_tracing() - self._start_memory
+
+
+def stage(instrumentation: Optional[Instrumentation], name: str, rows: Optional[int] = None):
+    '''
+        Returns instrumentation.stage(name, rows), or a no-op context yielding None if instrumentation is None.
+    '''
+    if instrumentation is None:
+        return _NO_STAGE
+    return instrumentation.stage(name, rows)
@@ -0,0 +1,101 @@
+import json
+import logging
+import threading
+import dataclasses
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from dw_timeseries_lib import Measurement
+
+from dw_normalization_lib.objects.filters import Filters
+
+log = logging.getLogger(__name__)
+
+Intermediate_key = Tuple[str, str]
+
+
+def intermediate_key(measurement: Measurement, filters: Filters, engine=None) -> Intermediate_key:
+    '''
+        Returns the cache key of the intermediates of a normalization: the systemId and a JSON string of the time window,
+        group and tags of the measurement, the filters and the calculation engine. The baseline is not part of the key.
+    '''
+    key = {
+        "group": int(measurement.group),
+        "start_datetime": measurement.start_datetime,
+        "end_datetime": measurement.end_datetime,
+        "timezone": getattr(measurement, "timezone", None),
+        "tags": {name: vars(tag) for name, tag in measurement.tags.items()},
+        "filters": {name: float(val) for name, val in dataclasses.asdict(filters).items()},
+        "engine": getattr(engine, "value", engine),
+    }
+    return (measurement.systemId, json.dumps(key, sort_keys=True, default=str))
+
+
+class Intermediate_cache:
+    '''
+        LRU cache of the filtered timeseries rows of a normalization together with the intermediate columns which
+        do not depend on the baseline (see Calculation_plan.baseline_independent_columns).
+        A normalization of the same window with another baseline fetches nothing and only computes the
+        baseline relative columns. The cache holds at most max_bytes, least recently used frames are evicted first.
+        For the FUSED engine, which recomputes every column from the raw tags, only the filtered rows are cached.
+        Counters:
+            hits: frames served from the cache
+            misses: frames not found
+    '''
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2) -> None:
+        """
+            Parameters:
+                max_bytes: int
+                    memory budget of the cached frames, a frame larger than the budget is not cached
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._frames: "OrderedDict[Intermediate_key, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Intermediate_key) -> Union[pd.DataFrame, None]:
+        '''
+            Returns a shallow copy of the cached frame, columns may be added to it without changing the cache.
+        '''
+        with self._lock:
+            if key not in self._frames:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return self._frames[key][0].copy(deep=False)
+
+    def set(self, key: Intermediate_key, df: pd.DataFrame):
+        '''
+            Caches a shallow copy of df, df must not be modified in place afterwards.
+        '''
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            log.debug(f'intermediates of system {key[0]} use {size} bytes, more than max_bytes {self.max_bytes}, not cached')
+            return
+        with self._lock:
+            self.__remove(key)
+            self._frames[key] = (df.copy(deep=False), size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self.__remove(next(iter(self._frames)))
+
+    def invalidate(self, systemId: Optional[str] = None):
+        '''
+            Removes the cached frames of systemId, or every cached frame if systemId is None.
+        '''
+        with self._lock:
+            for key in [key for key in self._frames if systemId is None or key[0] == systemId]:
+                self.__remove(key)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._frames), "bytes": self.bytes}
+
+    def __remove(self, key: Intermediate_key):
+        if key in self._frames:
+            self.bytes -= self._frames.pop(key)[1]
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dw_timeseries_lib import Measurement
+
+log = logging.getLogger(__name__)
+
+
+def measurement_time_bounds(measurement: Measurement):
+    '''
+        Returns the window of a measurement as UTC timestamps, naive datetimes are in the timezone of the measurement.
+    '''
+    bounds = []
+    for dt in (measurement.start_datetime, measurement.end_datetime):
+        timestamp = pd.Timestamp(dt)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize(getattr(measurement, "timezone", None) or "UTC")
+        bounds.append(timestamp.tz_convert("UTC"))
+    return bounds[0], bounds[1]
+
+
+def aggregate_measurement(time: np.ndarray, values: Dict[str, np.ndarray], measurement: Measurement) -> pd.DataFrame:
+    '''
+        Aggregates raw samples like the timeseries db does for a measurement: the mean of every tag per group seconds bucket,
+        buckets aligned to the epoch, every bucket of the window is returned, NaN where a bucket has no samples.
+        Parameters:
+            time: np.ndarray
+                int64 epoch nanoseconds (UTC) of the samples, sorted
+            values: Dict[str, np.ndarray]
+                float samples per tag name
+        Returns:
+            pd.DataFrame
+                Time as ISO strings and one column per tag of the measurement
+    '''
+    start, end = measurement_time_bounds(measurement)
+    group = int(measurement.group) * 1_000_000_000
+    first_bucket = start.value // group
+    n_buckets = max(-(-end.value // group) - first_bucket, 0)
+
+    lo, hi = np.searchsorted(time, [start.value, end.value], side="left")
+    buckets = time[lo:hi] // group - first_bucket
+    counts = np.bincount(buckets, minlength=n_buckets)[:n_buckets]
+
+    df = pd.DataFrame({"Time": pd.to_datetime((first_bucket + np.arange(n_buckets)) * group, utc=True).strftime("%Y-%m-%dT%H:%M:%SZ")})
+    for name in measurement.tags:
+        if name not in values:
+            df[name] = np.nan
+            continue
+        samples = values[name][lo:hi]
+        valid = ~np.isnan(samples)
+        sums = np.bincount(buckets[valid], weights=samples[valid], minlength=n_buckets)[:n_buckets]
+        valid_counts = np.bincount(buckets[valid], minlength=n_buckets)[:n_buckets]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            df[name] = np.where(valid_counts > 0, sums / valid_counts, np.nan)
+    if not counts.any():
+        return df.iloc[0:0]
+    return df
+
+
+class Memory_db_client:
+    '''
+        In memory stand-in for Db_client, for offline use and tests.
+        Holds raw samples per systemId, columns are matched by the tag names of the measurement (e.g. "FIT1"), not by tagId.
+        get_data aggregates the samples with aggregate_measurement.
+    '''
+    def __init__(self, data: Optional[Dict[str, pd.DataFrame]] = None) -> None:
+        self._data: Dict[str, tuple] = {}
+        self.calls = 0
+        for systemId, df in (data or {}).items():
+            self.add_data(systemId, df)
+
+    def add_data(self, systemId: str, df: pd.DataFrame):
+        '''
+            Stores the raw samples of a system, df has a Time column and a column per tag name.
+        '''
+        df = df.sort_values("Time", kind="stable")
+        time = pd.to_datetime(df["Time"], utc=True).to_numpy(dtype="datetime64[ns]").view("int64")
+        values = {
+            column: df[column].to_numpy(dtype=float, na_value=np.nan)
+            for column in df.columns if column != "Time"
+        }
+        self._data[systemId] = (time, values)
+
+    def get_data(self, measurements: List[Measurement]) -> List[Measurement]:
+        self.calls += 1
+        for measurement in measurements:
+            time, values = self._data.get(measurement.systemId, (np.empty(0, dtype="int64"), {}))
+            measurement.data = aggregate_measurement(time, values, measurement)
+        return measurements
+
+
+class Async_memory_db_client(Memory_db_client):
+    '''
+        Memory_db_client with a coroutine get_data, latency seconds are awaited per call to simulate the db round trip.
+    '''
+    def __init__(self, data: Optional[Dict[str, pd.DataFrame]] = None, latency: float = 0) -> None:
+        super().__init__(data)
+        self.latency = latency
+
+    async def get_data(self, measurements: List[Measurement]) -> List[Measurement]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return super().get_data(measurements)
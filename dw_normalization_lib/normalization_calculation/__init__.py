@@ -1 +1,4 @@
-from dw_normalization_lib.normalization_calculation.normalization_calculations import Normalized_calculations
\ No newline at end of file
+from dw_normalization_lib.normalization_calculation.calculation_plan import Calculation_plan, CALCULATION_GRAPH
+from dw_normalization_lib.normalization_calculation.normalization_calculations import Normalized_calculations
+from dw_normalization_lib.normalization_calculation.vectorized_calculations import Vectorized_normalized_calculations
+from dw_normalization_lib.normalization_calculation.fused_calculations import Fused_normalized_calculations
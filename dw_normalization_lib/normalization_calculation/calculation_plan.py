@@ -0,0 +1,226 @@
+import logging
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+from dw_normalization_lib.constants import Supported_Normalized_calcs
+from dw_normalization_lib.instrumentation import stage
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Calculation_node:
+    '''
+        A single column of the normalization calculation.
+            name: name of the column produced by the node
+            function: name of the calculate_* function of the calculation engine producing the column
+            dependencies: raw tags and node names the function reads
+            baseline: node names whose baseline value is passed to the function as argument
+    '''
+    name: str
+    function: str
+    dependencies: Tuple[str, ...] = ()
+    baseline: Tuple[str, ...] = ()
+
+
+CALCULATION_GRAPH: Dict[str, Calculation_node] = {node.name: node for node in (
+    Calculation_node("TT_1_C", "calculate_TT_1_C", ("TT1",)),
+    Calculation_node("coefficient", "calulate_coefficient", ("TT_1_C",)),
+    Calculation_node(
+        "temperature_correction_factor", "calculate_temperature_correction_factor", ("coefficient", "TT_1_C")
+    ),
+    Calculation_node("lead_element_flow", "calculate_lead_element_flow", ("FIT1", "FIT2", "FIT3")),
+    Calculation_node("module_recovery", "calculate_module_recovery", ("lead_element_flow", "FIT3")),
+    Calculation_node("feed_cond_C", "calculate_feed_cond_C", ("CIT1", "CIT2", "module_recovery")),
+    Calculation_node("feed_reject_cond_C", "calculate_feed_reject_cond_C", ("module_recovery", "feed_cond_C")),
+    Calculation_node("osmotic_pressure", "calculate_osmotic_pressure", ("feed_reject_cond_C", "TT_1_C")),
+    Calculation_node(
+        "trans_membrane_pressure", "calculate_trans_membrane_pressure", ("PT2", "PT3", "PT7", "osmotic_pressure")
+    ),
+    Calculation_node("osmotic_pressure_Posmo_p", "calculate_osmotic_pressure_Posmo_p", ("CIT3", "TT_1_C")),
+    Calculation_node("avg_feed", "calculate_avg_feed", ("CIT1", "CIT2")),
+    Calculation_node("avg_membrane_rejection", "calculate_avg_membrane_rejection", ("CIT3", "avg_feed")),
+    Calculation_node("operating_flux", "calculate_operating_flux", ("FIT3",)),
+    Calculation_node(
+        "specific_flux", "calculate_specific_flux", ("operating_flux", "net_driving_pressure")
+    ),
+    Calculation_node(
+        Supported_Normalized_calcs.NET_DRIVING_PRESSURE.value,
+        "calculate_net_driving_pressure",
+        ("PT2", "PT3", "PT7", "osmotic_pressure", "osmotic_pressure_Posmo_p")
+    ),
+    Calculation_node(
+        Supported_Normalized_calcs.PERMEATE_FLOW.value,
+        "calculate_normalized_permeate_flow",
+        ("FIT3", "trans_membrane_pressure", "temperature_correction_factor"),
+        ("trans_membrane_pressure", "temperature_correction_factor")
+    ),
+    Calculation_node(
+        Supported_Normalized_calcs.DIFFERENTIAL_PRESSURE.value,
+        "calculate_normalized_differential_pressure",
+        ("PT2", "PT3", "temperature_correction_factor"),
+        ("temperature_correction_factor",)
+    ),
+    Calculation_node(
+        Supported_Normalized_calcs.PERMEATE_TDS.value,
+        "calculate_normalized_permeate_TDS",
+        ("CIT3", "trans_membrane_pressure", "osmotic_pressure_Posmo_p", "feed_reject_cond_C"),
+        ("trans_membrane_pressure", "feed_reject_cond_C", "osmotic_pressure_Posmo_p")
+    ),
+    Calculation_node(
+        Supported_Normalized_calcs.FLUX.value,
+        "calculate_normalized_flux",
+        ("operating_flux", "trans_membrane_pressure", "temperature_correction_factor"),
+        ("trans_membrane_pressure", "temperature_correction_factor")
+    ),
+    Calculation_node(
+        Supported_Normalized_calcs.SALT_PASSAGE.value,
+        "calculate_normalized_salt_passage",
+        ("avg_membrane_rejection", "temperature_correction_factor"),
+        ("temperature_correction_factor",)
+    ),
+    Calculation_node(
+        Supported_Normalized_calcs.SPECIFIC_FLUX.value,
+        "calculate_normalized_specific_flux",
+        (Supported_Normalized_calcs.FLUX.value, Supported_Normalized_calcs.NET_DRIVING_PRESSURE.value)
+    ),
+)}
+
+
+class Calculation_plan():
+    '''
+        Ordered list of the calculation nodes required for a set of normalization calculations.
+        Every node appears once and after all of its dependencies, nodes not needed by the
+        requested calculations are not part of the plan.
+        With free_intermediates every intermediate column computed by the plan is removed from the frame
+        as soon as the last step reading it has run, only the outputs are added to the frame.
+    '''
+    def __init__(
+        self, calculations: List[Union[Supported_Normalized_calcs, str]], free_intermediates: bool = False
+    ) -> None:
+        self.free_intermediates = free_intermediates
+        self.outputs = []
+        for calculation in calculations:
+            name = calculation.value if isinstance(calculation, Supported_Normalized_calcs) else calculation
+            if name not in CALCULATION_GRAPH:
+                log.debug(f'{name} has no calculation node, skipping')
+                continue
+            if name not in self.outputs:
+                self.outputs.append(name)
+
+        self.steps: List[Calculation_node] = []
+        for name in self.outputs:
+            self.__add_node(name)
+
+    def __add_node(self, name: str):
+        if name not in CALCULATION_GRAPH or CALCULATION_GRAPH[name] in self.steps:
+            return
+        node = CALCULATION_GRAPH[name]
+        for dependency in node.dependencies:
+            self.__add_node(dependency)
+        self.steps.append(node)
+
+    @property
+    def columns(self) -> List[str]:
+        '''
+            names of the columns computed by the plan, in execution order
+        '''
+        return [node.name for node in self.steps]
+
+    @property
+    def raw_tags(self) -> List[str]:
+        '''
+            raw timeseries tags read by the plan
+        '''
+        tags = []
+        for node in self.steps:
+            for dependency in node.dependencies:
+                if dependency not in CALCULATION_GRAPH and dependency not in tags:
+                    tags.append(dependency)
+        return tags
+
+    @property
+    def baseline_columns(self) -> List[str]:
+        '''
+            intermediate columns whose baseline value is used by the plan
+        '''
+        columns = []
+        for node in self.steps:
+            for column in node.baseline:
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    @property
+    def baseline_independent_columns(self) -> List[str]:
+        '''
+            columns computed by the plan which depend on the raw rows only, neither directly nor through
+            one of their dependencies on a baseline value, in execution order
+        '''
+        dependent = set()
+        for node in self.steps:
+            if node.baseline or any(dependency in dependent for dependency in node.dependencies):
+                dependent.add(node.name)
+        return [node.name for node in self.steps if node.name not in dependent]
+
+    def baseline_values(self, baseline_df, calculation_client, rows: Optional[np.ndarray] = None) -> Dict[str, float]:
+        '''
+            Computes the baseline value of every column in baseline_columns from a frame of baseline tag values.
+            If rows is None the baseline is the last row of baseline_df. Otherwise rows holds, per data row, the index
+            of its baseline row in baseline_df and every column gets an array of per row values, or a single value
+            if all rows share the same baseline.
+        '''
+        columns = self.baseline_columns
+        if not columns:
+            return {}
+        df = Calculation_plan(columns).execute(baseline_df.copy(), calculation_client)
+        if rows is None:
+            return {column: df[column].values[-1] for column in columns}
+        if len(rows) and (rows == rows[0]).all():
+            return {column: df[column].values[rows[0]] for column in columns}
+        return {column: df[column].to_numpy(dtype=float)[rows] for column in columns}
+
+    def execute(self, df, calculation_client, baseline: Optional[Dict[str, float]] = None):
+        '''
+            Computes the plan on df with the given calculation engine.
+            Intermediate columns already present in df are reused, requested outputs are always computed.
+            baseline holds the values returned by baseline_values, scalars or per row arrays,
+            if None the baseline row is expected to be the last row of df.
+        '''
+        return calculation_client._execute(self, df, baseline)
+
+    def execute_steps(self, df, calculation_client, baseline: Optional[Dict[str, float]] = None):
+        '''
+            Computes the plan one column at a time with calculation_client._apply, every step is added to df.
+            With free_intermediates the intermediates computed here are dropped after the last step reading them,
+            intermediates which were already in df are kept.
+        '''
+        steps = [node for node in self.steps if node.name not in df or node.name in self.outputs]
+        last_read: Dict[str, int] = {}
+        if self.free_intermediates:
+            for i, node in enumerate(steps):
+                for column in node.dependencies:
+                    if column in CALCULATION_GRAPH and column not in self.outputs and column not in df:
+                        last_read[column] = i
+        for i, node in enumerate(steps):
+            log.debug(f'normalization - {node.function}')
+            if baseline is None:
+                args = tuple(df[column].values[-1] for column in node.baseline)
+            else:
+                args = tuple(baseline[column] for column in node.baseline)
+            with stage(calculation_client.instrumentation, node.name, len(df)):
+                df[node.name] = calculation_client._apply(
+                    df, getattr(calculation_client, node.function), args)
+            for column in [column for column, last in last_read.items() if last == i]:
+                del df[column]
+        return df
+
+    def __repr__(self) -> str:
+        return f'Calculation_plan(outputs={self.outputs}, steps={self.columns})'
+
+    def __str__(self) -> str:
+        lines = [f'Calculation plan for {", ".join(self.outputs)}:']
+        for i, node in enumerate(self.steps):
+            lines.append(f'{i + 1}. {node.name} <- {", ".join(node.dependencies)}')
+        return '\n'.join(lines)
@@ -1,11 +1,21 @@
 import numpy as np
+import pandas as pd
 import logging
 import math
+from typing import Optional
+
+from dw_normalization_lib.normalization_calculation.calculation_plan import Calculation_plan
+from dw_normalization_lib.instrumentation import Instrumentation
 
 log = logging.getLogger(__name__)
 
 class Normalized_calculations():
-    def __init__(self):
+    # whether _execute reuses intermediate columns already in the frame, see Intermediate_cache
+    reuses_intermediates = True
+
+    def __init__(self, instrumentation: Optional[Instrumentation] = None):
+        # records a stage per calculated column when set
+        self.instrumentation = instrumentation
         self.normalization_function_map = {
             "normalized_permeate_flow": self.normalized_permeate_flow,
             "normalized_differential_pressure": self.normalized_differential_pressure,
@@ -17,6 +27,26 @@ class Normalized_calculations():
             "system_status": self.system_status
         }
 
+    def _execute(self, plan, df, baseline=None):
+        '''
+            Computes a Calculation_plan on df, column by column.
+        '''
+        return plan.execute_steps(df, self, baseline)
+
+    def _apply(self, df, calculation, args=()):
+        '''
+            Evaluates a calculate_* function over the whole frame, one row at a time.
+            args may be per row arrays, e.g. the baseline values of a baseline schedule.
+        '''
+        if any(isinstance(arg, np.ndarray) for arg in args):
+            row_args = zip(*(np.broadcast_to(arg, len(df)) for arg in args))
+            return pd.Series(
+                [calculation(row, *arg) for (_, row), arg in zip(df.iterrows(), row_args)],
+                index=df.index,
+                dtype=float
+            )
+        return df.apply(calculation, axis=1, args=args)
+
     def calulate_coefficient(self, df):
         if df["TT_1_C"] > 25:
             return 2640
@@ -266,236 +296,25 @@ class Normalized_calculations():
 
 
     def normalized_permeate_flow(self, df):
-        if "TT_1_C" not in df:
-            df["TT_1_C"] = df.apply(self.calculate_TT_1_C, axis=1)
-        if "coefficient" not in df:
-            df["coefficient"] = df.apply(self.calulate_coefficient, axis=1)
-        if "temperature_correction_factor" not in df:
-            df["temperature_correction_factor"] = df.apply(
-                self.calculate_temperature_correction_factor, axis=1
-            )
-        if "lead_element_flow" not in df:
-            df["lead_element_flow"] = df.apply(self.calculate_lead_element_flow, axis=1)
-        if "module_recovery" not in df:
-            df["module_recovery"] = df.apply(self.calculate_module_recovery, axis=1)
-        if "feed_cond_C" not in df:
-            df["feed_cond_C"] = df.apply(self.calculate_feed_cond_C, axis=1)
-        if "feed_reject_cond_C" not in df:
-            df["feed_reject_cond_C"] = df.apply(
-                self.calculate_feed_reject_cond_C, axis=1)
-        if "osmotic_pressure" not in df:
-            df["osmotic_pressure"] = df.apply(self.calculate_osmotic_pressure, axis=1)
-        if "trans_membrane_pressure" not in df:
-            df["trans_membrane_pressure"] = df.apply(
-                self.calculate_trans_membrane_pressure, axis=1
-            )
-
-        args = (
-            df["trans_membrane_pressure"].values[-1],
-            df["temperature_correction_factor"].values[-1],
-        )
-        df["normalized_permeate_flow"] = df.apply(
-            self.calculate_normalized_permeate_flow, axis=1, args=args
-        )
-        return df
-
+        return Calculation_plan(["normalized_permeate_flow"]).execute(df, self)
 
     def normalized_differential_pressure(self, df):
-        if "TT_1_C" not in df:
-            df["TT_1_C"] = df.apply(self.calculate_TT_1_C, axis=1)
-        if "coefficient" not in df:
-            df["coefficient"] = df.apply(self.calulate_coefficient, axis=1)
-        if "temperature_correction_factor" not in df:
-            df["temperature_correction_factor"] = df.apply(
-                self.calculate_temperature_correction_factor, axis=1
-            )
-
-        args = (df["temperature_correction_factor"].values[-1],)
-        df["normalized_differential_pressure"] = df.apply(
-            self.calculate_normalized_differential_pressure, axis=1, args=args
-        )
-        return df
-
+        return Calculation_plan(["normalized_differential_pressure"]).execute(df, self)
 
     def normalized_permeate_TDS(self, df):
-        if "TT_1_C" not in df:
-            df["TT_1_C"] = df.apply(self.calculate_TT_1_C, axis=1)
-        if "osmotic_pressure_Posmo_p" not in df:
-            df["osmotic_pressure_Posmo_p"] = df.apply(
-                self.calculate_osmotic_pressure_Posmo_p, axis=1
-            )
-        if "lead_element_flow" not in df:
-            df["lead_element_flow"] = df.apply(self.calculate_lead_element_flow, axis=1)
-        if "module_recovery" not in df:
-            df["module_recovery"] = df.apply(self.calculate_module_recovery, axis=1)
-        if "feed_cond_C" not in df:
-            df["feed_cond_C"] = df.apply(self.calculate_feed_cond_C, axis=1)
-        if "feed_reject_cond_C" not in df:
-            df["feed_reject_cond_C"] = df.apply(
-                self.calculate_feed_reject_cond_C, axis=1)
-
-        if "osmotic_pressure" not in df:
-            df["osmotic_pressure"] = df.apply(self.calculate_osmotic_pressure, axis=1)
-        if "trans_membrane_pressure" not in df:
-            df["trans_membrane_pressure"] = df.apply(
-                self.calculate_trans_membrane_pressure, axis=1
-            )
-
-        args = (
-            df["trans_membrane_pressure"].values[-1],
-            df["feed_reject_cond_C"].values[-1],
-            df["osmotic_pressure_Posmo_p"].values[-1],
-        )
-        df["normalized_permeate_TDS"] = df.apply(
-            self.calculate_normalized_permeate_TDS, axis=1, args=args
-        )
-        return df
-
+        return Calculation_plan(["normalized_permeate_TDS"]).execute(df, self)
 
     def net_driving_pressure(self, df):
-        if "TT_1_C" not in df:
-            log.debug('normalization - calculate_TT_1_C')
-            df["TT_1_C"] = df.apply(self.calculate_TT_1_C, axis=1)
-        if "lead_element_flow" not in df:
-            log.debug('normalization - calculate_lead_element_flow')
-            df["lead_element_flow"] = df.apply(self.calculate_lead_element_flow, axis=1)
-        if "module_recovery" not in df:
-            log.debug('normalization - calculate_module_recovery')
-            df["module_recovery"] = df.apply(self.calculate_module_recovery, axis=1)
-        if "feed_cond_C" not in df:
-            log.debug('normalization - calculate_feed_cond_C')
-            df["feed_cond_C"] = df.apply(self.calculate_feed_cond_C, axis=1)
-        if "feed_reject_cond_C" not in df:
-            log.debug('normalization - calculate_feed_reject_cond_C')
-            df["feed_reject_cond_C"] = df.apply(
-                self.calculate_feed_reject_cond_C, axis=1)
-        if "osmotic_pressure" not in df:
-            log.debug('normalization - calculate_osmotic_pressure')
-            df["osmotic_pressure"] = df.apply(self.calculate_osmotic_pressure, axis=1)
-
-        if "osmotic_pressure_Posmo_p" not in df:
-            log.debug('normalization - calculate_osmotic_pressure_Posmo_p')
-            df["osmotic_pressure_Posmo_p"] = df.apply(
-                self.calculate_osmotic_pressure_Posmo_p, axis=1
-            )
-        log.debug('normalization - calculate_net_driving_pressure')
-        df["net_driving_pressure"] = df.apply(self.calculate_net_driving_pressure, axis=1)
-        return df
-
+        return Calculation_plan(["net_driving_pressure"]).execute(df, self)
 
     def normalized_flux(self, df):
-        if "TT_1_C" not in df:
-            df["TT_1_C"] = df.apply(self.calculate_TT_1_C, axis=1)
-        if "lead_element_flow" not in df:
-            df["lead_element_flow"] = df.apply(self.calculate_lead_element_flow, axis=1)
-        if "module_recovery" not in df:
-            df["module_recovery"] = df.apply(self.calculate_module_recovery, axis=1)
-        if "feed_cond_C" not in df:
-            df["feed_cond_C"] = df.apply(self.calculate_feed_cond_C, axis=1)
-        if "feed_reject_cond_C" not in df:
-            df["feed_reject_cond_C"] = df.apply(
-                self.calculate_feed_reject_cond_C, axis=1)
-        if "osmotic_pressure" not in df:
-            df["osmotic_pressure"] = df.apply(self.calculate_osmotic_pressure, axis=1)
-        if "trans_membrane_pressure" not in df:
-            df["trans_membrane_pressure"] = df.apply(
-                self.calculate_trans_membrane_pressure, axis=1
-            )
-
-        if "coefficient" not in df:
-            df["coefficient"] = df.apply(self.calulate_coefficient, axis=1)
-        if "temperature_correction_factor" not in df:
-            df["temperature_correction_factor"] = df.apply(
-                self.calculate_temperature_correction_factor, axis=1
-            )
-
-        if "operating_flux" not in df:
-            df["operating_flux"] = df.apply(self.calculate_operating_flux, axis=1)
-
-        args = (
-            df["trans_membrane_pressure"].values[-1],
-            df["temperature_correction_factor"].values[-1],
-        )
-        df["normalized_flux"] = df.apply(self.calculate_normalized_flux,
-                                        axis=1, args=args)
-        return df
-
+        return Calculation_plan(["normalized_flux"]).execute(df, self)
 
     def normalized_salt_passage(self, df):
-        if "avg_feed" not in df:
-            df["avg_feed"] = df.apply(self.calculate_avg_feed, axis=1)
-        if "avg_membrane_rejection" not in df:
-            df["avg_membrane_rejection"] = df.apply(
-                self.calculate_avg_membrane_rejection, axis=1
-            )
-
-        if "TT_1_C" not in df:
-            df["TT_1_C"] = df.apply(self.calculate_TT_1_C, axis=1)
-        if "coefficient" not in df:
-            df["coefficient"] = df.apply(self.calulate_coefficient, axis=1)
-        if "temperature_correction_factor" not in df:
-            df["temperature_correction_factor"] = df.apply(
-                self.calculate_temperature_correction_factor, axis=1
-            )
-
-        args = (df["temperature_correction_factor"].values[-1],)
-        df["normalized_salt_passage"] = df.apply(
-            self.calculate_normalized_salt_passage, axis=1, args=args
-        )
-        return df
-
+        return Calculation_plan(["normalized_salt_passage"]).execute(df, self)
 
     def normalized_specific_flux(self, df):
-        if "operating_flux" not in df:
-            df["operating_flux"] = df.apply(self.calculate_operating_flux, axis=1)
-
-        if "TT_1_C" not in df:
-            df["TT_1_C"] = df.apply(self.calculate_TT_1_C, axis=1)
-        if "lead_element_flow" not in df:
-            df["lead_element_flow"] = df.apply(self.calculate_lead_element_flow, axis=1)
-        if "module_recovery" not in df:
-            df["module_recovery"] = df.apply(self.calculate_module_recovery, axis=1)
-        if "feed_cond_C" not in df:
-            df["feed_cond_C"] = df.apply(self.calculate_feed_cond_C, axis=1)
-        if "feed_reject_cond_C" not in df:
-            df["feed_reject_cond_C"] = df.apply(
-                self.calculate_feed_reject_cond_C, axis=1)
-        if "osmotic_pressure" not in df:
-            df["osmotic_pressure"] = df.apply(self.calculate_osmotic_pressure, axis=1)
-
-        if "osmotic_pressure_Posmo_p" not in df:
-            df["osmotic_pressure_Posmo_p"] = df.apply(
-                self.calculate_osmotic_pressure_Posmo_p, axis=1
-            )
-
-        if "trans_membrane_pressure" not in df:
-            df["trans_membrane_pressure"] = df.apply(
-                self.calculate_trans_membrane_pressure, axis=1
-            )
-
-        if "coefficient" not in df:
-            df["coefficient"] = df.apply(self.calulate_coefficient, axis=1)
-        if "temperature_correction_factor" not in df:
-            df["temperature_correction_factor"] = df.apply(
-                self.calculate_temperature_correction_factor, axis=1
-            )
-
-        if "net_driving_pressure" not in df:
-            df["net_driving_pressure"] = df.apply(
-                self.calculate_net_driving_pressure, axis=1)
-        if "specific_flux" not in df:
-            df["specific_flux"] = df.apply(self.calculate_specific_flux, axis=1)
-
-        args = (
-            df["trans_membrane_pressure"].values[-1],
-            df["temperature_correction_factor"].values[-1],
-        )
-        df["normalized_flux"] = df.apply(self.calculate_normalized_flux,
-                                        axis=1, args=args)
-
-        df["normalized_specific_flux"] = df.apply(
-            self.calculate_normalized_specific_flux, axis=1)
-        return df
+        return Calculation_plan(["normalized_specific_flux"]).execute(df, self)
 
     def system_status(self, df):
         return df
\ No newline at end of file
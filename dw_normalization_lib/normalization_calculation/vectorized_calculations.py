@@ -0,0 +1,283 @@
+import numpy as np
+import logging
+
+from dw_normalization_lib.normalization_calculation.normalization_calculations import Normalized_calculations
+
+log = logging.getLogger(__name__)
+
+# tolerance of the vectorized results against the row-wise engine, np.allclose(vectorized, row_wise, VECTORIZED_RTOL, VECTORIZED_ATOL)
+VECTORIZED_RTOL = 1e-12
+VECTORIZED_ATOL = 1e-12
+
+
+def _values(df, column):
+    '''
+        Returns a column as a float64 array, None values are returned as NaN.
+        float64 columns are returned without a copy.
+    '''
+    values = df[column].to_numpy()
+    if values.dtype != np.float64:
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+    return values
+
+
+class Vectorized_normalized_calculations(Normalized_calculations):
+    '''
+        Column at a time implementation of Normalized_calculations.
+
+        Every calculate_* function receives the whole frame and returns a numpy array,
+        the IFERROR branches of the row-wise functions are expressed as masks.
+        This is the default engine of Normalization_client, Supported_calculation_engines.VECTORIZED.
+
+        The results match the row-wise functions within VECTORIZED_RTOL and VECTORIZED_ATOL (1e-12), NaN and inf at
+        the same rows. They are not bit identical: numpy's log may differ from math.log in the last digit
+        (feed_reject_cond_C), and the difference propagates to the columns computed from it, e.g. osmotic_pressure,
+        trans_membrane_pressure, net_driving_pressure, normalized_permeate_flow, normalized_permeate_TDS,
+        normalized_flux and normalized_specific_flux.
+    '''
+
+    def _apply(self, df, calculation, args=()):
+        return calculation(df, *args)
+
+    def calulate_coefficient(self, df):
+        return np.where(_values(df, "TT_1_C") > 25, 2640, 3020)
+
+
+    def calculate_TT_1_C(self, df):
+        tt1 = _values(df, "TT1")
+        return np.where(np.isnan(tt1), 0, (tt1 - 32) / 1.8)
+
+
+    # IFERROR(IF(T9-V9<2,U9+T9,T9),0)
+    def calculate_lead_element_flow(self, df):
+        fit1 = _values(df, "FIT1")
+        fit2 = _values(df, "FIT2")
+        fit3 = _values(df, "FIT3")
+        flow = np.where(
+            (fit1 - fit3) < 2,
+            np.where(np.isnan(fit2), 0, fit1 + fit2),
+            fit1
+        )
+        return np.where(np.isnan(fit1) | np.isnan(fit3), 0, flow)
+
+
+    # IFERROR(IF(Z8=0,0,V8/Z8),0)
+    def calculate_module_recovery(self, df):
+        lead_element_flow = _values(df, "lead_element_flow")
+        fit3 = _values(df, "FIT3")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            recovery = fit3 / lead_element_flow
+        invalid = np.isnan(lead_element_flow) | (lead_element_flow == 0) | np.isnan(fit3)
+        return np.where(invalid, 0, recovery)
+
+
+    # IFERROR(((L7*AC7)+((M7*1000)*(1-AC7)))*0.67,0)
+    def calculate_feed_cond_C(self, df):
+        cit1 = _values(df, "CIT1")
+        cit2 = _values(df, "CIT2")
+        module_recovery = _values(df, "module_recovery")
+        invalid = np.isnan(cit1) | np.isnan(module_recovery) | np.isnan(cit2)
+        return np.where(
+            invalid,
+            0,
+            (cit1 * module_recovery) + ((cit2 * 1_000) * (1 - module_recovery) * 0.67)
+        )
+
+
+    # IFERROR(IF(AC6=0,0,AH6*((LN(1/(1-AC6)))/AC6)),0)
+    def calculate_feed_reject_cond_C(self, df):
+        module_recovery = _values(df, "module_recovery")
+        feed_cond_C = _values(df, "feed_cond_C")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = 1 / (1 - module_recovery)
+            # the row-wise function returns 0 on ZeroDivisionError and on log of a non positive number
+            valid = (
+                (module_recovery != 0)
+                & ~np.isnan(module_recovery)
+                & ~np.isnan(feed_cond_C)
+                & (module_recovery != 1)
+                & (ratio > 0)
+            )
+            value = feed_cond_C * (np.log(np.where(valid, ratio, 1)) / module_recovery)
+        return np.where(valid, value, 0)
+
+
+    # IFERROR(IF(AG6<20000,(AG6*(C6+320))/491000,((0.0117*AG6-34/14.23)*((C6+320)/345))),0)
+    def calculate_osmotic_pressure(self, df):
+        feed_reject_cond_C = _values(df, "feed_reject_cond_C")
+        tt_1_c = _values(df, "TT_1_C")
+        with np.errstate(invalid="ignore"):
+            value = np.where(
+                feed_reject_cond_C < 20_000,
+                feed_reject_cond_C * (tt_1_c + 320) / 491_000,
+                ((0.0117 * feed_reject_cond_C) - (34 / 14.23)) * ((tt_1_c + 320) / 345)
+            )
+        return np.where(np.isnan(feed_reject_cond_C) | np.isnan(tt_1_c), 0, value)
+
+
+    # IFERROR((((E5+F5)/2)/14.23)-(12/14.23)-AF5,0)
+    def calculate_trans_membrane_pressure(self, df):
+        pt2 = _values(df, "PT2")
+        pt3 = _values(df, "PT3")
+        pt7 = _values(df, "PT7")
+        osmotic_pressure = _values(df, "osmotic_pressure")
+        value = (((pt2 + pt3) / 2) / 14.23) - (pt7 / 14.23) - osmotic_pressure
+        return np.where(np.isnan(pt2) | np.isnan(osmotic_pressure), 0, value)
+
+
+    # V184*($AJ$5/AJ184)*($AE$5/AE184)
+    def calculate_normalized_permeate_flow(
+        self, df, bl_trans_membrane_pressure, bl_temperature_correction_factor
+    ):
+        fit3 = _values(df, "FIT3")
+        trans_membrane_pressure = _values(df, "trans_membrane_pressure")
+        temperature_correction_factor = _values(df, "temperature_correction_factor")
+        invalid = (
+            np.isnan(fit3)
+            | np.isnan(trans_membrane_pressure)
+            | np.isnan(temperature_correction_factor)
+            | (trans_membrane_pressure == 0)
+            | (temperature_correction_factor == 0)
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = (
+                fit3
+                * (bl_trans_membrane_pressure / trans_membrane_pressure)
+                * (bl_temperature_correction_factor / temperature_correction_factor)
+            )
+        return np.where(invalid, 0, value)
+
+
+    # (IF(C5>25,EXP(2640*((1/298)-(1/(273+C5)))),EXP(3020*((1/298)-(1/(273+C5)))))
+    def calculate_temperature_correction_factor(self, df):
+        coefficient = _values(df, "coefficient")
+        tt_1_c = _values(df, "TT_1_C")
+        with np.errstate(divide="ignore", over="ignore"):
+            return np.exp(coefficient * ((1 / 298) - (1 / (273 + tt_1_c))))
+
+
+    # I8*($AE$5/AE8)
+    def calculate_normalized_differential_pressure(self, df, bl_temperature_correction_factor):
+        pt2 = _values(df, "PT2")
+        pt3 = _values(df, "PT3")
+        temperature_correction_factor = _values(df, "temperature_correction_factor")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (pt2 - pt3) * (bl_temperature_correction_factor / temperature_correction_factor)
+
+
+    # IFERROR((N5*(C5+320))/491000,0)
+    def calculate_osmotic_pressure_Posmo_p(self, df):
+        cit3 = _values(df, "CIT3")
+        tt_1_c = _values(df, "TT_1_C")
+        return np.where(
+            np.isnan(cit3) | np.isnan(tt_1_c),
+            0,
+            cit3 * (tt_1_c + 320) / 491_000
+        )
+
+
+    def calculate_normalized_permeate_TDS(
+        self, df, bl_trans_membrane_pressure, bl_feed_reject_cond_C, bl_osmotic_pressure_Posmo_p
+    ):
+        cit3 = _values(df, "CIT3")
+        trans_membrane_pressure = _values(df, "trans_membrane_pressure")
+        osmotic_pressure_Posmo_p = _values(df, "osmotic_pressure_Posmo_p")
+        feed_reject_cond_C = _values(df, "feed_reject_cond_C")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = (
+                (cit3 * 0.67)
+                * (
+                    (trans_membrane_pressure + osmotic_pressure_Posmo_p)
+                    / (bl_trans_membrane_pressure + bl_osmotic_pressure_Posmo_p)
+                )
+                * (bl_feed_reject_cond_C / feed_reject_cond_C)
+            )
+        return np.where(np.isnan(cit3), 0, value)
+
+
+    # IFERROR((L5*LN((M5*1000)/L5))/(1-(L5/(M5*1000))),0)
+    def calculate_avg_feed(self, df):
+        cit1 = _values(df, "CIT1")
+        cit2 = _values(df, "CIT2")
+        invalid = np.isnan(cit1) | np.isnan(cit2) | (cit1 == 0) | (cit2 == 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = (cit1 * np.log(cit2 * 1_000 / cit1)) / (
+                1 - (cit1 / (cit2 * 1_000))
+            )
+        return np.where(invalid, 0, value)
+
+
+    # (CALC) Q = IFERROR((O7-N7)/O7,0)
+    def calculate_avg_membrane_rejection(self, df):
+        cit3 = _values(df, "CIT3")
+        avg_feed = _values(df, "avg_feed")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = (avg_feed - cit3) / avg_feed
+        return np.where(np.isnan(cit3) | (avg_feed == 0), 0, value)
+
+
+    # 100*(1-Q33)*($AE$5/AE33)
+    def calculate_normalized_salt_passage(self, df, bl_temperature_correction_factor):
+        avg_membrane_rejection = _values(df, "avg_membrane_rejection")
+        temperature_correction_factor = _values(df, "temperature_correction_factor")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (
+                100
+                * (1 - avg_membrane_rejection)
+                / (bl_temperature_correction_factor / temperature_correction_factor)
+            )
+
+
+    # ((I5/2)-12-(AF5*14.23)+(AM5*14.23))*-1
+    def calculate_net_driving_pressure(self, df):
+        pt2 = _values(df, "PT2")
+        pt3 = _values(df, "PT3")
+        pt7 = _values(df, "PT7")
+        osmotic_pressure = _values(df, "osmotic_pressure")
+        osmotic_pressure_Posmo_p = _values(df, "osmotic_pressure_Posmo_p")
+        value = (
+            (((pt2 - pt3) / 2)
+                - pt7
+                - (osmotic_pressure * 14.23)
+                + (osmotic_pressure_Posmo_p * 14.23)) * (-1)
+        )
+        return np.where(np.isnan(pt2) | np.isnan(pt3), 0, value)
+
+
+    # IFERROR((V5*1440)/1200,0)
+    def calculate_operating_flux(self, df):
+        fit3 = _values(df, "FIT3")
+        return np.where(np.isnan(fit3), 0, fit3 * 1440 / 1200)
+
+
+    # IFERROR(AX5*($AJ$5/AJ5)*($AE$5/AE5),0)
+    def calculate_normalized_flux(
+        self, df, bl_trans_membrane_pressure, bl_temperature_correction_factor
+    ):
+        operating_flux = _values(df, "operating_flux")
+        trans_membrane_pressure = _values(df, "trans_membrane_pressure")
+        temperature_correction_factor = _values(df, "temperature_correction_factor")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (
+                operating_flux
+                * (bl_trans_membrane_pressure / trans_membrane_pressure)
+                * (bl_temperature_correction_factor / temperature_correction_factor)
+            )
+
+
+    # IFERROR(AX5/AV5,0)
+    def calculate_specific_flux(self, df):
+        operating_flux = _values(df, "operating_flux")
+        net_driving_pressure = _values(df, "net_driving_pressure")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = operating_flux / net_driving_pressure
+        return np.where(net_driving_pressure == 0, 0, value)
+
+
+    # IFERROR(AY6*((AJ6+AM6)/($AJ$5+$AM$5))*($AE$5/AE6),0)
+    def calculate_normalized_specific_flux(self, df):
+        normalized_flux = _values(df, "normalized_flux")
+        net_driving_pressure = _values(df, "net_driving_pressure")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = normalized_flux / net_driving_pressure
+        return np.where(net_driving_pressure == 0, 0, value)
@@ -1,16 +1,29 @@
 import pandas as pd
 import numpy as np
 import logging
-from typing import List, Dict, Union, Optional
+from contextlib import nullcontext
+from typing import Iterator, List, Dict, Union, Optional
 import datetime
 
 from dw_timeseries_lib import Db_client, Tag, Measurement
 
 from dw_normalization_lib.normalization_calculation.normalization_calculations import Normalized_calculations
+from dw_normalization_lib.normalization_calculation.vectorized_calculations import Vectorized_normalized_calculations
+from dw_normalization_lib.normalization_calculation.fused_calculations import Fused_normalized_calculations
+from dw_normalization_lib.normalization_calculation.calculation_plan import Calculation_plan
 from dw_normalization_lib.constants import LibConstants
-from dw_normalization_lib.constants import Supported_Normalized_calcs
-from dw_normalization_lib.objects.normalization_config import Normalization_config
+from dw_normalization_lib.constants import Supported_Normalized_calcs, Supported_calculation_engines, Supported_export_formats
+from dw_normalization_lib.objects.normalization_config import Normalization_config, split_time_window
 from dw_normalization_lib.objects.filters import Filters
+from dw_normalization_lib.objects.baseline import Baseline
+from dw_normalization_lib.objects.normalization_request import Normalization_request
+from dw_normalization_lib.objects.rollups import Rollup_pyramid
+from dw_normalization_lib.objects.filter_scenarios import Filter_scenarios, filter_columns
+from dw_normalization_lib.objects.result_export import to_arrow, to_parquet, to_records, to_columnar_json
+from dw_normalization_lib.objects.result_buffer import Result_buffer, df_to_arrays
+from dw_normalization_lib.baseline_cache import Baseline_cache, baseline_key
+from dw_normalization_lib.intermediate_cache import Intermediate_cache, intermediate_key
+from dw_normalization_lib.instrumentation import Instrumentation, Memory_peak, stage
 from dw_normalization_lib.errors import (
     Empty_timeseries_result,
     Missing_baseline_tag,
@@ -21,6 +34,30 @@ from dw_normalization_lib.errors import (
 
 log = logging.getLogger(__name__)
 
+CALCULATION_ENGINES = {
+    Supported_calculation_engines.ROW_WISE: Normalized_calculations,
+    Supported_calculation_engines.VECTORIZED: Vectorized_normalized_calculations,
+    Supported_calculation_engines.FUSED: Fused_normalized_calculations,
+}
+
+
+def baseline_time(timestamp: datetime.datetime, utc: bool) -> pd.Timestamp:
+    '''
+        Returns timestamp as a naive pd.Timestamp to compare with the Time column of baseline data,
+        in UTC if utc is True (naive timestamps are UTC), otherwise the wall time of timestamp.
+    '''
+    timestamp = pd.Timestamp(timestamp)
+    if utc and timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC")
+    return timestamp.tz_localize(None)
+
+
+def nan_to_none(df: pd.DataFrame) -> pd.DataFrame:
+    '''
+        Returns a copy of df in object dtype with None for missing values, for serialization.
+    '''
+    return df.astype(object).where(pd.notnull(df), None)
+
 
 class Normalization_client:
     id: int
@@ -31,13 +68,28 @@ class Normalization_client:
     end_datetime: Union[datetime.datetime, None] = None
     normalization_tags: Union[List[Supported_Normalized_calcs], None] = None
     baseline: Union[pd.DataFrame, None] = None
+    baseline_effective_from: Union[np.ndarray, None] = None
     filters: Filters
     tags: Union[List[str], None] = None
+    engine: Supported_calculation_engines
+    result_buffer: Union[Result_buffer, None] = None
+    baseline_cache: Union[Baseline_cache, None] = None
+    intermediate_cache: Union[Intermediate_cache, None] = None
+    instrumentation: Union[Instrumentation, None] = None
+    rollup_pyramid: Union[Rollup_pyramid, None] = None
+    memory_lean: bool = False
+    measure_peak: bool = False
 
     def __init__(
         self,
         timeseries_client: Db_client,
         normalization_config: Optional[Union[None, Normalization_config]],
+        engine: Supported_calculation_engines = Supported_calculation_engines.VECTORIZED,
+        baseline_cache: Optional[Baseline_cache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        intermediate_cache: Optional[Intermediate_cache] = None,
+        memory_lean: bool = False,
+        measure_peak: bool = False
     ) -> None:
         """
             Initializes parameters
@@ -46,6 +98,26 @@ class Normalization_client:
                     user for making calls to influx 
                 normalization_config: str
                     contains data on which normalization functions are required, time window and bucket size
+                engine: Supported_calculation_engines
+                    implementation used for the calculations, VECTORIZED computes whole columns at a time,
+                    ROW_WISE evaluates every row separately, FUSED computes all columns in a single compiled pass
+                    if numba is installed (see Fused_normalized_calculations)
+                baseline_cache: Optional[Baseline_cache] = None
+                    cache for baseline_from_timestamp results, may be shared between clients
+                instrumentation: Optional[Instrumentation] = None
+                    records time, rows and memory of every stage (fetch, filters, calculation, every calculated column)
+                intermediate_cache: Optional[Intermediate_cache] = None
+                    cache of the filtered rows and baseline independent intermediate columns of get_normalization,
+                    may be shared between clients, a new baseline for a cached window then only computes
+                    the baseline relative columns. The FUSED engine recomputes every column in its kernel,
+                    only the fetched and filtered rows are cached for it
+                memory_lean: bool = False
+                    drop every intermediate column as soon as the last calculation reading it has run, so only the
+                    requested outputs are added to the working frame
+                measure_peak: bool = False
+                    return with every get_normalization result, in result.attrs["peak_bytes"], the peak memory
+                    traced by tracemalloc during the call (see Memory_peak for what is counted).
+                    Tracing slows the calculation down, overlapping calls of several threads count each others allocations
         """
         if normalization_config:
             self.id = normalization_config.id
@@ -62,55 +134,141 @@ class Normalization_client:
             self.group = LibConstants.DEFAULT_GROUP
             self.filters = Filters()
 
+        self.engine = engine
+        self.baseline_cache = baseline_cache
+        self.instrumentation = instrumentation
+        self.intermediate_cache = intermediate_cache
+        self.memory_lean = memory_lean
+        self.measure_peak = measure_peak
         self.timeseries_client = timeseries_client
 
-    def add_baseline(self, baseline: Dict[str, float]):
-        def validate_baseline():
-            missing_tags = []
-            invalid_baseline_tags = []
-            for tag in LibConstants.BASELINE_TAGS:
-                if tag not in baseline:
-                    missing_tags.append(tag)
-                # elif type(baseline[tag]) is not float:
-                #     invalid_baseline_tags.append(tag)
-
-            if missing_tags:
-                msg = f'mapping is missing required tags for normalization. The following tags are missing: {", ".join(missing_tags)}'
-                log.error(msg)
-                raise Missing_baseline_tag(msg)
-
-            if invalid_baseline_tags:
-                msg = f'invalid values for some baseline tags: {", ".join(invalid_baseline_tags)}'
-                log.error(msg)
-                raise Invalid_baseline_values(msg)
-
+    def add_baseline(self, baseline: Union[Baseline, Dict[str, float]]):
         def baseline_to_df():
             df_dict = {key: [baseline[key]] for key in baseline}
-            df = pd.DataFrame.from_dict(df_dict)
+            df = pd.DataFrame.from_dict(df_dict).astype(float)  # None values become NaN
             return df
 
-        validate_baseline()
+        self.__validate_baseline(baseline)
         # continue if no error
 
         baseline_df = baseline_to_df()
         self.baseline = baseline_df
+        self.baseline_effective_from = None
+        # buffered incremental results and rollups were normalized against the previous baseline
+        self.reset_incremental_normalization()
+        self.rollup_pyramid = None
+
+    def add_baseline_schedule(
+        self, schedule: Union[List[Baseline], Dict[datetime.datetime, Dict[str, float]]]
+    ):
+        '''
+            Sets a baseline per period, e.g. a new baseline after every clean-in-place or membrane replacement.
+            Every row is normalized against the last baseline effective at its time, rows before the first
+            period against the first baseline, so a year spanning several periods is fetched and computed at once.
+            Parameters:
+                schedule: Union[List[Baseline], Dict[datetime.datetime, Dict[str, float]]]
+                    baselines with the timestamp they are effective from, naive timestamps are in UTC
+            Raises:
+                Invalid_baseline_values
+                    Iff the schedule is empty or a Baseline has no timestamp.
+        '''
+        if isinstance(schedule, dict):
+            schedule = [Baseline(baseline, timestamp) for timestamp, baseline in schedule.items()]
+        if not schedule:
+            raise Invalid_baseline_values('empty baseline schedule')
+        for baseline in schedule:
+            if getattr(baseline, "timestamp", None) is None:
+                msg = 'every baseline of a baseline schedule requires the timestamp it is effective from'
+                log.error(msg)
+                raise Invalid_baseline_values(msg)
+            self.__validate_baseline(baseline)
+
+        schedule = sorted(schedule, key=lambda baseline: baseline_time(baseline.timestamp, True))
+        self.baseline = pd.DataFrame.from_records([dict(baseline) for baseline in schedule]).astype(float)
+        self.baseline_effective_from = np.array(
+            [baseline_time(baseline.timestamp, True).value for baseline in schedule], dtype="int64")
+        self.reset_incremental_normalization()
+        self.rollup_pyramid = None
+
+    def __validate_baseline(self, baseline: Dict[str, float]):
+        missing_tags = []
+        invalid_baseline_tags = []
+        for tag in LibConstants.BASELINE_TAGS:
+            if tag not in baseline:
+                missing_tags.append(tag)
+            # elif type(baseline[tag]) is not float:
+            #     invalid_baseline_tags.append(tag)
+
+        if missing_tags:
+            msg = f'mapping is missing required tags for normalization. The following tags are missing: {", ".join(missing_tags)}'
+            log.error(msg)
+            raise Missing_baseline_tag(msg)
+
+        if invalid_baseline_tags:
+            msg = f'invalid values for some baseline tags: {", ".join(invalid_baseline_tags)}'
+            log.error(msg)
+            raise Invalid_baseline_values(msg)
+
+    def baseline_from_timestamp(self, timestamp: datetime.datetime) -> Baseline:
+        if not self.systemId:
+            raise SystemId_not_configured()
+        return self.baselines_from_timestamps([timestamp])[0]
 
-    def baseline_from_timestamp(self, timestamp: datetime.datetime):
-        def extract_closest_df_value(df, column, timestamp):
-            df = df[[column]]
-            df = df.dropna()
-            if len(df):
-                loc = df.index.get_loc(timestamp, method="nearest")
-                val = df[column][loc]
-                if np.isnan(val):
-                    val = None
-                return val
-            else:
-                return None
-
+    def baselines_from_timestamps(self, timestamps: List[datetime.datetime]) -> List[Baseline]:
+        '''
+            Returns the baseline of every timestamp, e.g. one per cleaning event, with a single get_data call.
+            Timestamps whose hour windows overlap share a measurement, cached baselines are not fetched.
+            Parameters:
+                timestamps: List[datetime.datetime]
+                    baseline timestamps, naive timestamps are in UTC
+            Returns:
+                List[Baseline]
+                    the baselines in the order of timestamps
+        '''
         if not self.systemId:
             raise SystemId_not_configured()
 
+        baselines = [self.cached_baseline(timestamp) for timestamp in timestamps]
+        missing = [i for i, baseline in enumerate(baselines) if baseline is None]
+        if missing:
+            windows = self.__baseline_windows([timestamps[i] for i in missing])
+            measurments = [
+                self.baseline_measurement(timestamps[missing[window[0]]], timestamps[missing[window[-1]]])
+                for window in windows
+            ]
+            res_measurments = self.__fetch(measurments, "baseline_fetch")
+            for window, res_measurment in zip(windows, res_measurments):
+                window_timestamps = [timestamps[missing[j]] for j in window]
+                for j, baseline in zip(window, self.baselines_from_df(res_measurment.data, window_timestamps)):
+                    baselines[missing[j]] = baseline
+                    self.cache_baseline(timestamps[missing[j]], baseline)
+
+        return baselines
+
+    def cached_baseline(self, timestamp: datetime.datetime) -> Union[Baseline, None]:
+        '''
+            Returns the baseline of timestamp from baseline_cache, None if there is no cache or no cached baseline.
+        '''
+        if self.baseline_cache is None:
+            return None
+        baseline = self.baseline_cache.get(baseline_key(self.systemId, self.mapping, timestamp))
+        if baseline is None:
+            return None
+        log.debug(f'baseline of system {self.systemId} at {timestamp} served from cache')
+        return Baseline(baseline, timestamp)
+
+    def cache_baseline(self, timestamp: datetime.datetime, baseline: Dict[str, float]):
+        # a window without data is not cached, the data may still arrive
+        if self.baseline_cache is not None and any(val is not None for val in baseline.values()):
+            self.baseline_cache.set(baseline_key(self.systemId, self.mapping, timestamp), baseline)
+
+    def baseline_measurement(
+        self, timestamp: datetime.datetime, end_timestamp: Optional[datetime.datetime] = None
+    ) -> Measurement:
+        '''
+            Returns the timeseries db measurement of the baseline tags in the hour around timestamp,
+            or from 30 minutes before timestamp to 30 minutes after end_timestamp.
+        '''
         tz = timestamp.tzinfo
         if tz:
             tz = str(tz)
@@ -118,14 +276,14 @@ class Normalization_client:
             tz = 'UTC'
 
         dt = timestamp.replace(tzinfo=None)
-        start_dt = dt - datetime.timedelta(minutes=30)
-        end_dt = dt + datetime.timedelta(minutes=30)
+        end_dt = (end_timestamp or timestamp).replace(tzinfo=None)
+        start_dt = dt - LibConstants.BASELINE_WINDOW
+        end_dt = end_dt + LibConstants.BASELINE_WINDOW
 
-        measurments = list()
         tags = {}
         for tag in LibConstants.BASELINE_TAGS:
             tags[tag] = Tag(tag, self.mapping[tag])
-        baseline_measurment = Measurement(
+        return Measurement(
             "baseline",
             self.systemId,
             tags,
@@ -136,68 +294,436 @@ class Normalization_client:
             db=LibConstants.DEFAULT_DB,
             bucket="ccro-systems"
         )
-        measurments.append(baseline_measurment)
-        res_measurment = self.timeseries_client.get_data(measurments)
-        df = res_measurment[0].data
 
-        baseline = {}
-        if df is not None and not df.empty:
-            df_dt = pd.to_datetime(dt)
-            df["Time"] = pd.to_datetime(df["Time"]).dt.tz_localize(
-                None)  # convert from ISO to df TimeStamp
-            df = df.set_index("Time")
-            for i, column in enumerate(df.columns.values.tolist()):
-                if column == "Time":
-                    continue
-                val = extract_closest_df_value(df.copy(), column, df_dt)
-                baseline[column] = val
-        else:
+    def baseline_from_df(self, df, timestamp: datetime.datetime) -> Baseline:
+        '''
+            Extracts the baseline from the data of baseline_measurement, the value closest to timestamp per tag.
+        '''
+        return self.baselines_from_df(df, [timestamp])[0]
+
+    def baselines_from_df(self, df, timestamps: List[datetime.datetime]) -> List[Baseline]:
+        '''
+            Extracts the baselines of timestamps from the data of baseline_measurement in a single pass per tag:
+            the non-null value closest to the timestamp, within 30 minutes of it, on a tie the later value.
+            df is not modified.
+        '''
+        if df is None or df.empty:
             mapping_tags_string = ' '.join(
-                [self.mapping[tag] for tag in tag in LibConstants.BASELINE_TAGS])
-            log.warn('No data in timeseries db for all tags in selected mapping: {mapping_tags_string}, \
-                for system {self.systemId} in the time window from {start_dt} to {end_dt}')
-            baseline = {elem: None for elem in self.mapping}
+                [self.mapping[tag] for tag in LibConstants.BASELINE_TAGS])
+            for timestamp in timestamps:
+                log.warning(f'No data in timeseries db for all tags in selected mapping: {mapping_tags_string}, \
+                    for system {self.systemId} in the 1 hour time window around {timestamp.replace(tzinfo=None)}')
+            return [Baseline({elem: None for elem in self.mapping}, timestamp) for timestamp in timestamps]
+
+        times = pd.to_datetime(df["Time"])  # convert from ISO to df TimeStamp
+        aware = times.dt.tz is not None
+        times = (times.dt.tz_convert("UTC").dt.tz_localize(None) if aware else times).to_numpy(dtype="datetime64[ns]")
+        targets = np.array([
+            baseline_time(timestamp, aware).to_datetime64() for timestamp in timestamps
+        ], dtype="datetime64[ns]")
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        max_distance = np.timedelta64(LibConstants.BASELINE_WINDOW)
+
+        values = {}
+        for column in df.columns:
+            if column == "Time":
+                continue
+            column_values = df[column].to_numpy(dtype=float, na_value=np.nan)[order]
+            valid = ~np.isnan(column_values)
+            column_times, column_values = times[valid], column_values[valid]
+            if not len(column_times):
+                values[column] = [None] * len(timestamps)
+                continue
+            # first sample at or after the target, and the sample before it
+            after = np.searchsorted(column_times, targets, side="left")
+            before = np.clip(after - 1, 0, None)
+            after_clipped = np.clip(after, None, len(column_times) - 1)
+            use_before = (after == len(column_times)) | (
+                (after > 0) & (targets - column_times[before] < column_times[after_clipped] - targets)
+            )
+            closest = np.where(use_before, before, after_clipped)
+            in_window = np.abs(column_times[closest] - targets) <= max_distance
+            values[column] = [
+                float(val) if found else None for val, found in zip(column_values[closest], in_window)
+            ]
+
+        return [
+            Baseline({column: column_values[i] for column, column_values in values.items()}, timestamp)
+            for i, timestamp in enumerate(timestamps)
+        ]
+
+    @staticmethod
+    def __baseline_windows(timestamps: List[datetime.datetime]) -> List[List[int]]:
+        '''
+            Groups the indexes of timestamps of the same timezone whose baseline windows overlap, in time order.
+        '''
+        windows = []
+        previous = None
+        for i in sorted(range(len(timestamps)), key=lambda i: (str(timestamps[i].tzinfo), timestamps[i].replace(tzinfo=None))):
+            timestamp = timestamps[i]
+            if (
+                previous is not None
+                and str(previous.tzinfo) == str(timestamp.tzinfo)
+                and timestamp.replace(tzinfo=None) - previous.replace(tzinfo=None) <= 2 * LibConstants.BASELINE_WINDOW
+            ):
+                windows[-1].append(i)
+            else:
+                windows.append([i])
+            previous = timestamp
+        return windows
+
+    def calculation_plan(self) -> Calculation_plan:
+        '''
+            Returns the calculation plan for the configured normalization tags,
+            the plan lists every intermediate column computed by get_normalization in execution order.
+        '''
+        return Calculation_plan(
+            [tag for tag in self.normalization_tags if tag in Supported_Normalized_calcs])
+
+    def required_tags(self) -> List[str]:
+        '''
+            Returns the baseline tags which have to be fetched from the timeseries db,
+            the raw tags read by the calculation plan and the tags the filters are applied on.
+        '''
+        required = set(self.calculation_plan().raw_tags)
+        required.update(LibConstants.FILTER_TAGS)
+        return [tag for tag in self.baseline if tag in required]
+
+    def normalize(self, request: Normalization_request) -> Union[pd.DataFrame, None]:
+        '''
+            Reentrant version of get_normalization, the configuration, baseline and tags are taken from request
+            and nothing is stored on the client, so a single client, e.g. created without configuration,
+            can serve concurrent requests from many threads.
+            The timeseries client, baseline_cache, intermediate_cache, instrumentation, memory_lean and measure_peak
+            of this client are shared by the requests,
+            the timeseries client must support concurrent get_data calls.
+            Parameters:
+                request: Normalization_request
+            Returns:
+                the result of get_normalization for the request
+        '''
+        client = Normalization_client(
+            self.timeseries_client,
+            request.config,
+            engine=self.engine,
+            baseline_cache=self.baseline_cache,
+            instrumentation=self.instrumentation,
+            intermediate_cache=self.intermediate_cache,
+            memory_lean=self.memory_lean,
+            measure_peak=self.measure_peak
+        )
+        baseline = request.baseline
+        if isinstance(baseline, datetime.datetime):
+            baseline = client.baseline_from_timestamp(baseline)
+        if isinstance(baseline, list):
+            client.add_baseline_schedule(baseline)
+        else:
+            client.add_baseline(baseline)
+        client.tags = request.tags
+        return client.get_normalization(nan_as_none=request.nan_as_none)
 
-        return baseline
+    def get_normalization(self, nan_as_none: bool = False):
+        '''
+            Parameters:
+                nan_as_none: bool = False
+                    return missing values as None in object columns instead of NaN, for serialization
+            Returns:
+                the normalization, None if there are no rows.
+                With measure_peak the peak traced memory of the call is in attrs["peak_bytes"] of the result.
+        '''
+        # a memory tracing instrumentation records the peak itself, its stages would reset the peak of Memory_peak
+        traced = self.instrumentation is not None and self.instrumentation.trace_memory
+        memory_peak = Memory_peak() if self.measure_peak and not traced else nullcontext()
+        with memory_peak, stage(self.instrumentation, "get_normalization") as metrics:
+            if self.intermediate_cache is None:
+                df = self.normalization_from_df(self.__normalization_mapping_df_from_timeseries_db())
+            else:
+                df = self.__intermediates_df()
+                if df is not None:
+                    with stage(self.instrumentation, "calculation", len(df)):
+                        df = self.__calculate_normalization_df(df)
+            if metrics is not None:
+                metrics.rows = 0 if df is None else len(df)
+        if nan_as_none and df is not None:
+            df = nan_to_none(df)
+        if self.measure_peak:
+            peak_bytes = metrics.peak_bytes if traced else memory_peak.peak_bytes
+            log.debug(f'normalization of system {self.systemId} peak memory: {peak_bytes} bytes')
+            if df is not None:
+                df.attrs["peak_bytes"] = peak_bytes
+        return df
 
-    def get_normalization(self):
+    def get_normalization_as(
+        self,
+        export_format: Supported_export_formats,
+        path: Optional[str] = None,
+        dtype=np.float64,
+        time_unit: str = "ms"
+    ):
+        '''
+            Returns get_normalization in a columnar format, without going through per row python objects.
+            Parameters:
+                export_format: Supported_export_formats
+                    ARROW: pyarrow Table, PARQUET: parquet file, NUMPY: numpy structured array,
+                    JSON: columnar JSON string {"Time": [...], "normalized_flux": [...], ...}
+                path: Optional[str] = None
+                    PARQUET only, file to write, the file content is returned as bytes if None
+                dtype
+                    float dtype of the result columns, np.float64 or np.float32, JSON is always float64
+                time_unit: str = "ms"
+                    unit of the int64 epoch Time column, one of "s", "ms", "us", "ns"
+            Returns:
+                the exported result, None if there are no rows.
+                Labels and units of LibConstants.LABELS and UNITS are in the column metadata of ARROW, PARQUET and NUMPY.
+        '''
+        df = self.get_normalization()
+        if df is None:
+            return None
+        if export_format == Supported_export_formats.ARROW:
+            return to_arrow(df, dtype, time_unit)
+        if export_format == Supported_export_formats.PARQUET:
+            return to_parquet(df, path, dtype, time_unit)
+        if export_format == Supported_export_formats.NUMPY:
+            return to_records(df, dtype, time_unit)
+        if export_format == Supported_export_formats.JSON:
+            return to_columnar_json(df, time_unit)
+        raise ValueError(f'unsupported export format {export_format}')
+
+    def get_rollup(self, group: int, aggregation: str = "mean", refresh: bool = False) -> Union[pd.DataFrame, None]:
+        '''
+            Returns the normalization aggregated to group seconds, with the columns of get_normalization.
+            The normalization is fetched and computed once at the configured group and kept in rollup_pyramid,
+            every resolution is derived from it, so zooming in and out does not query the timeseries db again.
+            Parameters:
+                group: int
+                    bucket length in seconds, a multiple of the configured group, e.g. 300, 3600, 86400
+                aggregation: str = "mean"
+                    mean, min, max or count of the normalized values per bucket
+                refresh: bool = False
+                    fetch and compute the normalization again
+            Returns:
+                the rollup, None if there are no rows
+        '''
+        if self.rollup_pyramid is None or refresh:
+            df = self.get_normalization()
+            if df is None:
+                return None
+            self.rollup_pyramid = Rollup_pyramid(df, self.group)
+        return self.rollup_pyramid.get(group, aggregation)
+
+    def get_filter_scenarios(self, filters: List[Filters], packed: bool = False) -> Filter_scenarios:
+        '''
+            Fetches and normalizes the configured time window once without filters,
+            every scenario sets the normalized values of the rows out of its bounds to NaN.
+            Further scenarios, e.g. while an operator drags a filter slider, are added with Filter_scenarios.add
+            without fetching or computing again. The configured filters are not applied.
+            Parameters:
+                filters: List[Filters]
+                    the filter scenarios
+                packed: bool = False
+                    store the masks bit packed, 8 rows per byte
+            Returns:
+                Filter_scenarios
+                    scenario(i) equals get_normalization with filters[i].
+                    summary() holds count, mean, min and max per scenario and column.
+            Raises:
+                Empty_timeseries_result
+                    Iff no data was returned.
+        '''
         df = self.__normalization_mapping_df_from_timeseries_db()
-        df = self.__add_baseline(df)
-        df = self.__apply_filters(df)
+        with stage(self.instrumentation, "to_numeric", len(df)):
+            df = self.__to_numeric(df)
+        filter_df = filter_columns(df)
+        with stage(self.instrumentation, "calculation", len(df)):
+            df = self.__calculate_normalization_df(df, apply_filters=False)
+        with stage(self.instrumentation, "filter_scenarios", len(df)):
+            return Filter_scenarios(df, filter_df, filters, packed, self.normalization_columns())
+
+    def iter_normalization(self, chunk: datetime.timedelta) -> Iterator[pd.DataFrame]:
+        '''
+            Normalizes the configured time window chunk by chunk, one query per chunk, and yields the result of every chunk.
+            All chunks are normalized against the same baseline, so the concatenated results equal get_normalization.
+            Parameters:
+                chunk: datetime.timedelta
+                    length of a chunk, rounded up to a multiple of group
+            Raises:
+                Empty_timeseries_result
+                    Iff no chunk returned data.
+        '''
+        found_data = False
+        for start_datetime, end_datetime in split_time_window(self.start_datetime, self.end_datetime, chunk, self.group):
+            measurments = list()
+            measurments.append(self.normalization_measurement(start_datetime, end_datetime))
+            res_measurment = self.__fetch(measurments)
+            df = res_measurment[0].data
+            if df is None or df.empty:
+                log.debug(f'no data for system {self.systemId} from {start_datetime} to {end_datetime}')
+                continue
+
+            found_data = True
+            df = self.normalization_from_df(self.validate_timeseries_df(df))
+            if df is not None:
+                yield df
+
+        if not found_data:
+            raise Empty_timeseries_result("Error in fetching data for baseline tags - no data")
+
+    def normalization_from_df(self, df):
+        '''
+            Runs the normalization pipeline, baseline, filters and calculations, on timeseries data
+            already fetched with the measurement returned by normalization_measurement.
+        '''
+        df = self.numeric_df(df)
+        if df is None:
+            return None
+        with stage(self.instrumentation, "calculation", len(df)):
+            df = self.__calculate_normalization_df(df)
+        return df
+
+    def numeric_df(self, df):
+        '''
+            Casts the required tag columns of fetched timeseries data to float64.
+            Returns None if df has no rows.
+            The filters are applied to the result of the calculation, see filter_mask and mask_filtered_rows.
+        '''
+        with stage(self.instrumentation, "to_numeric", len(df)):
+            df = self.__to_numeric(df)
         if df.shape[0] == 0:
             log.warning(f'widget: {self.__repr__}')
             return None
-        df = self.__calculate_normalization_df(df)
-        df = self.__remove_baseline(df)
         return df
 
-    def __normalization_mapping_df_from_timeseries_db(self):
+    def __intermediates_df(self):
+        '''
+            Returns the rows of the configured window with the baseline independent columns of the
+            calculation plan, from intermediate_cache or fetched, computed and cached.
+            The columns are only computed for engines which reuse them, the FUSED engine gets the fetched rows.
+            None if there are no rows.
+        '''
+        measurement = self.normalization_measurement()
+        key = intermediate_key(measurement, self.filters, self.engine)
+        df = self.intermediate_cache.get(key)
+        if df is not None:
+            log.debug(f'intermediates of system {self.systemId} served from intermediate_cache')
+            return df
+
+        df = self.numeric_df(self.validate_timeseries_df(self.__fetch([measurement])[0].data))
+        if df is None:
+            return None
+        calculation_client = CALCULATION_ENGINES[self.engine](self.instrumentation)
+        if calculation_client.reuses_intermediates:
+            with stage(self.instrumentation, "intermediates", len(df)):
+                plan = Calculation_plan(self.calculation_plan().baseline_independent_columns)
+                # an empty baseline, none of the columns reads a baseline value
+                df = plan.execute(df, calculation_client, {})
+        self.intermediate_cache.set(key, df)
+        return df.copy(deep=False)
+
+    def get_incremental_normalization(
+        self,
+        window: Optional[datetime.timedelta] = None,
+        end_datetime: Optional[datetime.datetime] = None
+    ) -> pd.DataFrame:
+        '''
+            Returns the normalization of a sliding time window, only data newer than the previous call is fetched and normalized.
+            The results are kept in a Result_buffer, the last bucket is fetched again on every call since it may have been incomplete,
+            rows older than the window are evicted.
+            Parameters:
+                window: Optional[datetime.timedelta] = None
+                    length of the sliding window, defaults to the configured time window length
+                end_datetime: Optional[datetime.datetime] = None
+                    end of the window in UTC, defaults to now
+            Returns:
+                pd.DataFrame
+                    the normalization results of the window, in the format of get_normalization.
+                    The window starts at the bucket containing end_datetime - window, like get_normalization
+                    of the same time window, that first bucket holds the data of the whole bucket.
+        '''
+        if end_datetime is None:
+            end_datetime = datetime.datetime.utcnow()
+        if window is None:
+            window = self.end_datetime - self.start_datetime
+        window_start = end_datetime - window
+
+        start_datetime = window_start
+        if self.result_buffer is not None and self.result_buffer.last_time is not None:
+            last_datetime = pd.Timestamp(self.result_buffer.last_time, tz="UTC")
+            if window_start.tzinfo is None:
+                last_datetime = last_datetime.tz_localize(None)
+            start_datetime = max(last_datetime.to_pydatetime(), window_start)
+
         measurments = list()
+        measurments.append(self.normalization_measurement(start_datetime, end_datetime))
+        res_measurment = self.__fetch(measurments)
+        df = res_measurment[0].data
+
+        if df is not None and not df.empty:
+            self.validate_timeseries_df(df)
+            result = self.normalization_from_df(df)
+            arrays = df_to_arrays(result)
+            if arrays is not None:
+                if self.result_buffer is None:
+                    # twice the window rows, so the buffer is compacted once per window length of new rows
+                    capacity = 2 * (window.total_seconds() // self.group + 1)
+                    self.result_buffer = Result_buffer(list(arrays), capacity)
+                self.result_buffer.append(arrays, result["Time"].to_numpy())
+        else:
+            log.debug(f'no new data for system {self.systemId} from {start_datetime} to {end_datetime}')
+
+        if self.result_buffer is None:
+            return None
+        evict_before = pd.Timestamp(window_start)
+        evict_before = evict_before.tz_localize("UTC") if evict_before.tzinfo is None else evict_before.tz_convert("UTC")
+        # the bucket containing window_start is part of the window, like in the query
+        group_ns = int(self.group) * 1_000_000_000
+        self.result_buffer.evict_before(evict_before.value // group_ns * group_ns)
+        return self.result_buffer.to_df()
+
+    def reset_incremental_normalization(self):
+        '''
+            Drops the buffered results of get_incremental_normalization, the next call fetches the whole window.
+        '''
+        self.result_buffer = None
+
+    def normalization_measurement(
+        self,
+        start_datetime: Optional[datetime.datetime] = None,
+        end_datetime: Optional[datetime.datetime] = None
+    ) -> Measurement:
+        '''
+            Returns the timeseries db measurement holding the data required by get_normalization.
+            The configured time window is used unless start_datetime or end_datetime are passed.
+        '''
         tags = {}
-        for tag in self.baseline:
+        for tag in self.required_tags():
             tags[tag] = Tag(tag, self.mapping[tag])
         # case client requested additional system tags
         if self.tags:
             for tag in self.tags:
                 tags[tag] = Tag(tag, tag, LibConstants.DEFAULT_FUNCTION)
         # resume normal flow
-        new_measurment = Measurement(
+        return Measurement(
             "normalization",
             self.systemId,
             tags,
             self.group,
-            self.start_datetime,
-            self.end_datetime,
+            start_datetime or self.start_datetime,
+            end_datetime or self.end_datetime,
             db=LibConstants.DEFAULT_DB,
             bucket="ccro-systems"
         )
-        measurments.append(new_measurment)
-        res_measurment = self.timeseries_client.get_data(measurments)
-        df = res_measurment[0].data
 
-        if df.empty:
+    def validate_timeseries_df(self, df):
+        '''
+            Validates the data returned for the normalization measurement.
+            Raises:
+                Empty_timeseries_result
+                    Iff no data was returned.
+        '''
+        if df is None or df.empty:
             error = "Error in fetching data for baseline tags - no data"
-            raise Empty_timeseries_result(error, code=1)
+            raise Empty_timeseries_result(error)
 
         series_null_columns = df.isna().all()
         if series_null_columns.any():
@@ -208,15 +734,34 @@ class Normalization_client:
 
         return df
 
-    def __add_baseline(self, df):
-        df = df.append(self.baseline, ignore_index=True)
-        return df
-
-    def __remove_baseline(self, df):
-        df.drop(df.tail(1).index, inplace=True)
+    def __normalization_mapping_df_from_timeseries_db(self):
+        measurments = list()
+        measurments.append(self.normalization_measurement())
+        res_measurment = self.__fetch(measurments)
+        return self.validate_timeseries_df(res_measurment[0].data)
+
+    def __fetch(self, measurments: List[Measurement], name: str = "fetch") -> List[Measurement]:
+        with stage(self.instrumentation, name) as metrics:
+            res_measurments = self.timeseries_client.get_data(measurments)
+            if metrics is not None:
+                metrics.rows = sum(len(res.data) for res in res_measurments if res.data is not None)
+        return res_measurments
+
+    def __to_numeric(self, df):
+        '''
+            Casts the tag columns read by the calculations and filters to float64, missing values are NaN.
+            Additional tags are returned as fetched.
+        '''
+        for column in self.required_tags():
+            if column in df and df[column].dtype != np.float64:
+                df[column] = pd.to_numeric(df[column], errors="coerce").astype(float)
         return df
 
-    def __apply_filters(self, df):
+    def filter_mask(self, df) -> np.ndarray:
+        '''
+            Returns a boolean array, True for the rows of df within the bounds of the filters, see Filters.mask.
+            df holds the raw filter tags, the normalized values of the other rows are set to NaN by mask_filtered_rows.
+        '''
         def store_max_min_values(df, widget):
             widget[LibConstants.DATA_MIN_MAX_VALUES] = {
                 "Recovery": {"Max": round(df["Last_CCD_VR"].max(), 2), "Min": round(df["Last_CCD_VR"].min(), 2)},
@@ -238,40 +783,70 @@ class Normalization_client:
             f'Filter Feed Flow, Low: {self.filters.feed_flow_low}, High :{self.filters.feed_flow_high}')
         log.debug(
             f'Filter Reject Conductivity, Low: {self.filters.reject_conductivity_low}, High :{self.filters.reject_conductivity_high}')
-        initial_row_count = df.shape[0]
-        df_filters = df[["Last_CCD_VR", "FIT1", "CIT2"]]
-        df_filters.loc[
-            (df["Last_CCD_VR"] < float(self.filters.recovery_low))
-            | (df["Last_CCD_VR"] > float(self.filters.recovery_high))
-            | (df["FIT1"] < float(self.filters.feed_flow_low))
-            | (df["FIT1"] > float(self.filters.feed_flow_high))
-            | (df["CIT2"] < float(self.filters.reject_conductivity_low))
-            | (df["CIT2"] > float(self.filters.reject_conductivity_high))
-        ] = np.nan
-
-        df = df.where(pd.notnull(df), None)
+        mask = self.filters.mask(df)
 
         # df.dropna(subset=["FIT1", "CIT2", "Last_CCD_VR"], inplace=True)
-        filter_row_count = df.shape[0]
-        if filter_row_count > 0:
-            log.info(f'Filtered rows : {initial_row_count - filter_row_count}')
+        log.info(f'Filtered rows : {int((~mask).sum())}')
+        return mask
+
+    def mask_filtered_rows(self, df, mask: np.ndarray):
+        '''
+            Returns a normalization result with the normalized values of the rows out of the filter bounds,
+            False in mask, set to NaN. The rows with their Time and additional tags are kept.
+            Masking the filter tags instead would run the calculations on NaN inputs, whose IFERROR branches return
+            plausible looking values.
+        '''
+        columns = [column for column in self.normalization_columns() if column in df]
+        if mask.all() or not columns:
+            return df
+        df = df.copy(deep=False)
+        for column in columns:
+            df[column] = np.where(mask, df[column].to_numpy(dtype=float, na_value=np.nan), np.nan)
         return df
 
-    def __calculate_normalization_df(self, df):
-        for i, tag in enumerate(self.normalization_tags):
-            if tag in Supported_Normalized_calcs:
-                calculation_client = Normalized_calculations()
-                log.debug(
-                    f'Calling normalized Function :{calculation_client.normalization_function_map[tag.value]}, Tag :{tag.value}'
-                )
-                df = calculation_client.normalization_function_map[tag.value](
-                    df)
+    def __calculate_normalization_df(self, df, apply_filters: bool = True):
+        if apply_filters:
+            with stage(self.instrumentation, "filters", len(df)):
+                mask = self.filter_mask(df)
+        calculation_client = CALCULATION_ENGINES[self.engine](self.instrumentation)
+        plan = Calculation_plan(self.calculation_plan().outputs, free_intermediates=self.memory_lean)
+        if self.intermediate_cache is not None:
+            # outputs kept in intermediate_cache with the baseline independent columns are not computed again
+            plan = Calculation_plan([name for name in plan.outputs if name not in df], self.memory_lean)
+        log.debug(f'Executing {plan!r}')
+        with stage(self.instrumentation, "baseline_values"):
+            baseline = plan.baseline_values(self.baseline, CALCULATION_ENGINES[self.engine](), self.baseline_rows(df))
+        df = plan.execute(df, calculation_client, baseline)
+
+        with stage(self.instrumentation, "result", len(df)):
+            res_df = df[self.result_columns()]
+            if apply_filters:
+                res_df = self.mask_filtered_rows(res_df, mask)
+        return res_df
 
+    def baseline_rows(self, df) -> Union[np.ndarray, None]:
+        '''
+            Returns per row of df the index of its baseline in the baseline frame, None if a single baseline applies.
+        '''
+        if self.baseline_effective_from is None:
+            return None
+        # index of the baseline effective at every row
+        times = pd.to_datetime(df["Time"], utc=True).to_numpy(dtype="datetime64[ns]").view("int64")
+        return np.clip(np.searchsorted(self.baseline_effective_from, times, side="right") - 1, 0, None)
+
+    def normalization_columns(self) -> List[str]:
+        '''
+            Returns the normalized columns of the get_normalization result.
+        '''
+        return [tag.value for tag in self.normalization_tags if tag in Supported_Normalized_calcs]
+
+    def result_columns(self) -> List[str]:
+        '''
+            Returns the columns of the get_normalization result, Time, the normalization tags and the additional tags.
+        '''
         result_columns = ["Time"]
-        result_columns.extend(
-            [tag.value for tag in self.normalization_tags if tag in Supported_Normalized_calcs])
+        result_columns.extend(self.normalization_columns())
         # case client requested additional system tags
         if self.tags:
             result_columns.extend([tag for tag in self.tags])
-        res_df = df[result_columns]
-        return res_df
+        return result_columns
@@ -1,2 +1,37 @@
+import importlib
+from typing import TYPE_CHECKING
+
 from dw_normalization_lib.objects.filters import Filters
 from dw_normalization_lib.objects.normalization_config import Normalization_config
+from dw_normalization_lib.objects.baseline import Baseline
+from dw_normalization_lib.objects.normalization_request import Normalization_request
+
+# objects depending on pandas are imported on first access
+_LAZY_IMPORTS = {
+    "Result_buffer": "dw_normalization_lib.objects.result_buffer",
+    "to_arrow": "dw_normalization_lib.objects.result_export",
+    "to_parquet": "dw_normalization_lib.objects.result_export",
+    "to_records": "dw_normalization_lib.objects.result_export",
+    "to_columnar_json": "dw_normalization_lib.objects.result_export",
+    "Rollup_pyramid": "dw_normalization_lib.objects.rollups",
+    "rollup": "dw_normalization_lib.objects.rollups",
+    "Filter_scenarios": "dw_normalization_lib.objects.filter_scenarios",
+}
+
+if TYPE_CHECKING:
+    from dw_normalization_lib.objects.result_buffer import Result_buffer
+    from dw_normalization_lib.objects.result_export import to_arrow, to_parquet, to_records, to_columnar_json
+    from dw_normalization_lib.objects.rollups import Rollup_pyramid, rollup
+    from dw_normalization_lib.objects.filter_scenarios import Filter_scenarios
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
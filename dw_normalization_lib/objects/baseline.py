@@ -0,0 +1,23 @@
+import datetime
+from typing import Dict, Optional
+
+
+class Baseline(dict):
+    '''
+        Baseline tag values, as returned by baseline_from_timestamp, ready to be passed to add_baseline.
+        A dict of tag: value, value is None if no data was found for the tag,
+        timestamp is the time the baseline was taken at.
+    '''
+    def __init__(self, values: Dict[str, Optional[float]], timestamp: Optional[datetime.datetime] = None) -> None:
+        super().__init__(values)
+        self.timestamp = timestamp
+
+    @property
+    def is_empty(self) -> bool:
+        '''
+            True if no value was found for any tag
+        '''
+        return all(val is None for val in self.values())
+
+    def __repr__(self) -> str:
+        return f'Baseline({dict.__repr__(self)}, timestamp={self.timestamp!r})'
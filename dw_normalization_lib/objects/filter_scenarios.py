@@ -0,0 +1,142 @@
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dw_normalization_lib.constants import LibConstants
+from dw_normalization_lib.objects.filters import Filters
+
+
+class Filter_scenarios():
+    '''
+        Normalization result computed once without filters, with the mask of every Filters scenario.
+        Filters set the normalized values of the rows out of bounds to NaN, so scenario(i), the unfiltered result
+        with NaN in the masked columns of the rows out of the bounds of filters[i], equals get_normalization
+        with filters[i] and a new scenario costs a mask operation.
+    '''
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        filter_df: pd.DataFrame,
+        filters: List[Filters],
+        packed: bool = False,
+        columns: Optional[List[str]] = None
+    ) -> None:
+        """
+            Parameters:
+                df: pd.DataFrame
+                    the unfiltered normalization result
+                filter_df: pd.DataFrame
+                    the columns of LibConstants.FILTER_TAGS of the rows of df
+                filters: List[Filters]
+                    the scenarios
+                packed: bool = False
+                    store the masks bit packed, 8 rows per byte
+                columns: Optional[List[str]] = None
+                    the normalized columns set to NaN out of the bounds, every column but Time if None.
+                    Time and additional tags are kept on every row
+        """
+        self.df = df
+        self.filter_df = filter_df
+        self.packed = packed
+        self.columns = [column for column in df.columns if column != "Time"] if columns is None else list(columns)
+        self.filters: List[Filters] = []
+        self._masks: List[np.ndarray] = []
+        for scenario in filters:
+            self.add(scenario)
+
+    def __len__(self) -> int:
+        return len(self.filters)
+
+    def add(self, filters: Filters) -> int:
+        '''
+            Adds a scenario, returns its index.
+        '''
+        mask = filters.mask(self.filter_df)
+        self.filters.append(filters)
+        self._masks.append(np.packbits(mask) if self.packed else mask)
+        return len(self.filters) - 1
+
+    def mask(self, i: int) -> np.ndarray:
+        '''
+            Returns the boolean mask of scenario i, True for the rows within the bounds of its filters.
+        '''
+        if self.packed:
+            return np.unpackbits(self._masks[i], count=len(self.df)).astype(bool)
+        return self._masks[i]
+
+    def masks(self) -> np.ndarray:
+        '''
+            Returns the masks of all scenarios, a boolean array of shape (scenarios, rows),
+            or the bit packed uint8 array of shape (scenarios, ceil(rows / 8)) if packed.
+        '''
+        if not self._masks:
+            return np.empty((0, len(self.df)), dtype=np.uint8 if self.packed else bool)
+        return np.stack(self._masks)
+
+    def scenario(self, i: int) -> pd.DataFrame:
+        '''
+            Returns the normalization result of scenario i, get_normalization with filters[i].
+        '''
+        mask = self.mask(i)
+        return pd.DataFrame({
+            column: np.where(mask, self.df[column].to_numpy(dtype=float, na_value=np.nan), np.nan)
+            if column in self.columns else self.df[column].to_numpy()
+            for column in self.df.columns
+        })
+
+    def summary(self) -> pd.DataFrame:
+        '''
+            Returns per scenario and result column the count, mean, min and max of the values of scenario(i),
+            NaN values are ignored. Indexed by (scenario, column), rows holds the number of rows within the bounds of the scenario.
+            Non numeric columns, e.g. string valued additional tags, are not summarized.
+        '''
+        columns = [
+            column for column in self.df.columns
+            if column != "Time" and pd.api.types.is_numeric_dtype(self.df[column])
+        ]
+        values = _float_values(self.df, columns)
+        # columns which are not masked keep their values on every row
+        masked = np.array([column in self.columns for column in columns], dtype=bool)
+        masks = np.stack([self.mask(i) for i in range(len(self))]) if len(self) else np.empty((0, len(self.df)), dtype=bool)
+
+        shape = (len(masks), len(columns))
+        counts = np.empty(shape, dtype=np.int64)
+        sums = np.empty(shape)
+        minimums = np.empty(shape)
+        maximums = np.empty(shape)
+        for i, mask in enumerate(masks):
+            scenario = np.where(mask[:, None] | ~masked, values, np.nan)
+            valid = ~np.isnan(scenario)
+            counts[i] = valid.sum(axis=0)
+            sums[i] = np.where(valid, scenario, 0).sum(axis=0)
+            with np.errstate(invalid="ignore"):
+                minimums[i] = np.fmin.reduce(scenario, axis=0) if len(scenario) else np.nan
+                maximums[i] = np.fmax.reduce(scenario, axis=0) if len(scenario) else np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, sums / counts, np.nan)
+
+        index = pd.MultiIndex.from_product([range(len(self)), columns], names=["scenario", "column"])
+        return pd.DataFrame({
+            "rows": np.repeat(masks.sum(axis=1), len(columns)),
+            "count": counts.ravel(),
+            "mean": means.ravel(),
+            "min": minimums.ravel(),
+            "max": maximums.ravel(),
+        }, index=index)
+
+
+def _float_values(df: pd.DataFrame, columns: List[str]):
+    '''
+        Returns the columns as a float array of shape (rows, columns).
+    '''
+    if not columns:
+        return np.empty((len(df), 0))
+    return np.column_stack([df[column].to_numpy(dtype=float, na_value=np.nan) for column in columns])
+
+
+def filter_columns(df: pd.DataFrame) -> pd.DataFrame:
+    '''
+        Returns the columns of df the filters are applied on.
+    '''
+    return df[[tag for tag in LibConstants.FILTER_TAGS if tag in df]].reset_index(drop=True)
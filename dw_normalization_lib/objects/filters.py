@@ -1,4 +1,8 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
 
 @dataclass
 class Filters:
@@ -12,3 +16,24 @@ class Filters:
     feed_flow_high: float = float('inf')
     recovery_low: float = 0
     recovery_high: float = float('inf')
+
+    def mask(self, df) -> "np.ndarray":
+        '''
+            Returns a boolean array, True for the rows of df within the filter bounds.
+            Rows with a missing value in a filter column are within the bounds.
+        '''
+        import numpy as np  # imported here so that importing Filters does not load numpy
+
+        recovery = df["Last_CCD_VR"].to_numpy(dtype=float, na_value=np.nan)
+        feed_flow = df["FIT1"].to_numpy(dtype=float, na_value=np.nan)
+        reject_conductivity = df["CIT2"].to_numpy(dtype=float, na_value=np.nan)
+        with np.errstate(invalid="ignore"):
+            rejected = (
+                (recovery < float(self.recovery_low))
+                | (recovery > float(self.recovery_high))
+                | (feed_flow < float(self.feed_flow_low))
+                | (feed_flow > float(self.feed_flow_high))
+                | (reject_conductivity < float(self.reject_conductivity_low))
+                | (reject_conductivity > float(self.reject_conductivity_high))
+            )
+        return ~rejected
@@ -1,5 +1,6 @@
+import copy
 import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 from dw_normalization_lib.constants import LibConstants, Supported_Normalized_calcs
 from dw_normalization_lib.errors import Missing_mapping_tag
@@ -86,3 +87,46 @@ class Normalization_config():
                 if tag not in self.mapping:
                     missing_tags.append(tag)
             raise Missing_mapping_tag(f'mapping is missing required tags for normalization. The following tags are missing: {", ".join(missing_tags)}')
+
+
+    def split(self, chunk: datetime.timedelta) -> List["Normalization_config"]:
+        '''
+            Splits the time window into consecutive windows, see split_time_window.
+            Returns:
+                List[Normalization_config]
+                    copies of the config, one per window, in chronological order
+        '''
+        configs = []
+        for start_datetime, end_datetime in split_time_window(self.start_datetime, self.end_datetime, chunk, self.group):
+            config = copy.copy(self)
+            config.start_datetime = start_datetime
+            config.end_datetime = end_datetime
+            configs.append(config)
+        return configs
+
+
+def split_time_window(
+    start_datetime: datetime.datetime,
+    end_datetime: datetime.datetime,
+    chunk: datetime.timedelta,
+    group: int
+) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    '''
+        Splits a time window into consecutive windows of at most chunk length.
+        chunk is rounded up to a multiple of group and the boundaries between the windows are multiples of group
+        since the epoch, naive datetimes are UTC. The timeseries db returns the epoch aligned bucket containing the
+        start of a window, so every bucket is returned by exactly one window, computed from all of its data.
+    '''
+    group = datetime.timedelta(seconds=group)
+    chunk = max(chunk, group)
+    if chunk % group:
+        chunk = (chunk // group + 1) * group
+
+    epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc if start_datetime.tzinfo else None)
+    windows = []
+    while start_datetime < end_datetime:
+        boundary = start_datetime + chunk
+        boundary -= (boundary - epoch) % group
+        windows.append((start_datetime, min(boundary, end_datetime)))
+        start_datetime = windows[-1][1]
+    return windows
@@ -0,0 +1,22 @@
+import datetime
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from dw_normalization_lib.objects.baseline import Baseline
+from dw_normalization_lib.objects.normalization_config import Normalization_config
+
+
+@dataclass(frozen=True)
+class Normalization_request:
+    '''
+        Everything a normalization depends on, passed to Normalization_client.normalize.
+            config: system, time window, calculations, mapping and filters
+            baseline: the baseline values, a baseline schedule (list of Baselines with timestamps),
+                or the timestamp to fetch the baseline at
+            tags: additional system tags returned with the result
+            nan_as_none: return missing values as None in object columns instead of NaN
+    '''
+    config: Normalization_config
+    baseline: Union[Baseline, Dict[str, float], List[Baseline], datetime.datetime]
+    tags: Optional[List[str]] = None
+    nan_as_none: bool = False
@@ -0,0 +1,130 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Union
+
+# format of the ISO Time strings returned by the timeseries db
+ISO_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def df_to_arrays(df: Union[pd.DataFrame, None]) -> Union[Dict[str, np.ndarray], None]:
+    '''
+        Converts a normalization result to arrays, Time as int64 epoch nanoseconds (UTC)
+        and every other column as float64 with NaN for missing values.
+        Columns with non numeric values, e.g. string valued additional tags, are returned as object arrays.
+    '''
+    if df is None:
+        return None
+    arrays = {"Time": pd.to_datetime(df["Time"], utc=True).to_numpy(dtype="datetime64[ns]").view("int64")}
+    for column in df.columns:
+        if column == "Time":
+            continue
+        try:
+            arrays[column] = df[column].to_numpy(dtype=float, na_value=np.nan)
+        except (TypeError, ValueError):
+            arrays[column] = df[column].to_numpy(dtype=object)
+    return arrays
+
+
+def arrays_to_df(arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+    '''
+        Inverse of df_to_arrays, Time is returned as UTC timestamps.
+    '''
+    df = pd.DataFrame(arrays)
+    df["Time"] = pd.to_datetime(df["Time"], utc=True)
+    return df
+
+
+class Result_buffer():
+    '''
+        Time ordered buffer of normalization results stored as numpy arrays.
+        New rows are appended at the end, old rows are evicted from the start,
+        the arrays are compacted in place and only grow when the capacity is exceeded.
+        Columns are float64, a column becomes object when object values are appended to it.
+        The Time values passed to append, e.g. the ISO strings of the timeseries db, are kept as they are
+        and returned by to_df, the rows are ordered and evicted by their epoch time.
+    '''
+    def __init__(self, columns: List[str], capacity: int) -> None:
+        self.columns = [column for column in columns if column != "Time"]
+        self.capacity = max(int(capacity), 1)
+        self._time = np.empty(self.capacity, dtype="int64")
+        self._time_values = np.empty(self.capacity, dtype=object)
+        self._values = {column: np.empty(self.capacity, dtype=float) for column in self.columns}
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_time(self) -> Union[int, None]:
+        '''
+            epoch nanoseconds of the newest row, None if the buffer is empty
+        '''
+        if not len(self):
+            return None
+        return int(self._time[self._end - 1])
+
+    def append(self, arrays: Dict[str, np.ndarray], time_values: Optional[np.ndarray] = None):
+        '''
+            Appends rows in the format of df_to_arrays.
+            Buffered rows at or after the first appended time are replaced.
+            time_values is the Time column of the rows as returned by to_df, UTC timestamps if None.
+        '''
+        time = arrays["Time"]
+        if not len(time):
+            return
+        self._end = self._start + int(np.searchsorted(self._time[self._start:self._end], time[0], side="left"))
+
+        needed = len(self) + len(time)
+        if self._end + len(time) > self.capacity:
+            self.__reserve(needed)
+
+        self._time[self._end:self._end + len(time)] = time
+        if time_values is None:
+            time_values = pd.to_datetime(time, utc=True).to_numpy(dtype=object)
+        self._time_values[self._end:self._end + len(time)] = time_values
+        for column in self.columns:
+            if arrays[column].dtype == object and self._values[column].dtype != object:
+                self._values[column] = self._values[column].astype(object)
+            self._values[column][self._end:self._end + len(time)] = arrays[column]
+        self._end += len(time)
+
+    def evict_before(self, time: int):
+        '''
+            Removes the rows older than time, epoch nanoseconds.
+        '''
+        self._start += int(np.searchsorted(self._time[self._start:self._end], time, side="left"))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {"Time": self._time[self._start:self._end].copy()}
+        for column in self.columns:
+            arrays[column] = self._values[column][self._start:self._end].copy()
+        return arrays
+
+    def to_df(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.to_arrays())
+        df["Time"] = self._time_values[self._start:self._end].copy()
+        return df
+
+    def __reserve(self, needed: int):
+        size = len(self)
+        if needed > self.capacity:
+            capacity = max(needed, 2 * self.capacity)
+            time = np.empty(capacity, dtype="int64")
+            time[:size] = self._time[self._start:self._end]
+            self._time = time
+            time_values = np.empty(capacity, dtype=object)
+            time_values[:size] = self._time_values[self._start:self._end]
+            self._time_values = time_values
+            for column in self.columns:
+                values = np.empty(capacity, dtype=self._values[column].dtype)
+                values[:size] = self._values[column][self._start:self._end]
+                self._values[column] = values
+            self.capacity = capacity
+        else:
+            self._time[:size] = self._time[self._start:self._end]
+            self._time_values[:size] = self._time_values[self._start:self._end]
+            for column in self.columns:
+                self._values[column][:size] = self._values[column][self._start:self._end]
+        self._start = 0
+        self._end = size
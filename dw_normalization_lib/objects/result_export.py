@@ -0,0 +1,112 @@
+import io
+import json
+from typing import Dict, Union, Optional
+
+import numpy as np
+import pandas as pd
+
+from dw_normalization_lib.constants import LibConstants
+from dw_normalization_lib.objects.result_buffer import df_to_arrays
+
+TIME_UNITS = {"s": 1_000_000_000, "ms": 1_000_000, "us": 1_000, "ns": 1}
+
+
+def column_metadata(column: str) -> Dict[str, str]:
+    '''
+        Returns the label and unit of a result column from LibConstants.LABELS and UNITS, empty for other columns.
+    '''
+    metadata = {}
+    if column in LibConstants.LABELS:
+        metadata["label"] = LibConstants.LABELS[column]
+    if column in LibConstants.UNITS:
+        metadata["unit"] = LibConstants.UNITS[column]
+    return metadata
+
+
+def result_arrays(df: pd.DataFrame, dtype=np.float64, time_unit: str = "ms") -> Dict[str, np.ndarray]:
+    '''
+        Returns the columns of a normalization result as numpy arrays, Time as int64 epoch time_unit (UTC)
+        and every other column as dtype with NaN for missing values.
+    '''
+    if time_unit not in TIME_UNITS:
+        raise ValueError(f'unsupported time unit {time_unit}, supported units: {", ".join(TIME_UNITS)}')
+    arrays = df_to_arrays(df)
+    if TIME_UNITS[time_unit] != 1:
+        arrays["Time"] = arrays["Time"] // TIME_UNITS[time_unit]
+    for column in arrays:
+        if column != "Time":
+            arrays[column] = arrays[column].astype(dtype, copy=False)
+    return arrays
+
+
+def to_arrow(df: pd.DataFrame, dtype=np.float64, time_unit: str = "ms"):
+    '''
+        Returns a normalization result as a pyarrow Table, the label and unit of every column are stored in the field metadata.
+        Requires pyarrow.
+    '''
+    import pyarrow as pa
+
+    arrays = result_arrays(df, dtype, time_unit)
+    fields = []
+    for column, values in arrays.items():
+        metadata = column_metadata(column)
+        if column == "Time":
+            metadata = {"unit": time_unit, "epoch": "1970-01-01T00:00:00Z"}
+        fields.append(pa.field(column, pa.from_numpy_dtype(values.dtype), metadata=metadata or None))
+    # NaN is stored as null
+    columns = [
+        pa.array(values, mask=np.isnan(values) if column != "Time" else None)
+        for column, values in arrays.items()
+    ]
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields))
+
+
+def to_parquet(df: pd.DataFrame, path: Optional[str] = None, dtype=np.float64, time_unit: str = "ms") -> Union[str, bytes]:
+    '''
+        Writes a normalization result to a parquet file, the table of to_arrow.
+        Returns path, or the file content if path is None.
+        Requires pyarrow.
+    '''
+    import pyarrow.parquet as pq
+
+    table = to_arrow(df, dtype, time_unit)
+    if path is not None:
+        pq.write_table(table, path)
+        return path
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+    return buffer.getvalue()
+
+
+def to_records(df: pd.DataFrame, dtype=np.float64, time_unit: str = "ms") -> np.ndarray:
+    '''
+        Returns a normalization result as a numpy structured array, one field per column.
+        The label and unit of every field are in the metadata of its dtype, e.g. records.dtype["normalized_flux"].metadata.
+    '''
+    arrays = result_arrays(df, dtype, time_unit)
+    fields = []
+    for column, values in arrays.items():
+        metadata = column_metadata(column) if column != "Time" else {"unit": time_unit}
+        fields.append((column, np.dtype(values.dtype, metadata=metadata)))
+    records = np.empty(len(arrays["Time"]), dtype=fields)
+    for column, values in arrays.items():
+        records[column] = values
+    return records
+
+
+def to_columnar_json(df: pd.DataFrame, time_unit: str = "ms") -> str:
+    '''
+        Returns a normalization result as a columnar JSON object, {"Time": [...], "normalized_flux": [...], ...},
+        Time as epoch time_unit, NaN and infinite values as null.
+    '''
+    arrays = result_arrays(df, np.float64, time_unit)
+    parts = []
+    for column, values in arrays.items():
+        if column == "Time":
+            encoded = json.dumps(values.tolist())
+        else:
+            # lists of numbers only, NaN is the only token to replace
+            values = np.where(np.isinf(values), np.nan, values)
+            encoded = json.dumps(values.tolist()).replace("NaN", "null")
+        parts.append(f'{json.dumps(column)}: {encoded}')
+    return "{" + ", ".join(parts) + "}"
@@ -0,0 +1,106 @@
+from typing import Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from dw_normalization_lib.objects.result_buffer import ISO_TIME_FORMAT, df_to_arrays
+
+SUPPORTED_AGGREGATIONS = ("mean", "min", "max", "count")
+
+
+def rollup(df: pd.DataFrame, group: int, aggregation: str = "mean") -> pd.DataFrame:
+    '''
+        Aggregates a normalization result to a coarser resolution, per group seconds bucket aligned to the epoch
+        like the timeseries db buckets. The result has the columns of df, a row per bucket holding at least one row,
+        Time is the bucket start in the format of df (ISO strings or UTC timestamps).
+        Aggregates are over the normalized values, NaN values are ignored, count is the number of values per bucket.
+        Columns which are not numeric (e.g. string tags) hold the first value of every bucket, whatever the aggregation but count.
+        Parameters:
+            df: pd.DataFrame
+                a result of get_normalization
+            group: int
+                bucket length in seconds
+            aggregation: str
+                one of SUPPORTED_AGGREGATIONS
+    '''
+    if aggregation not in SUPPORTED_AGGREGATIONS:
+        raise ValueError(f'unsupported aggregation {aggregation}, supported aggregations: {", ".join(SUPPORTED_AGGREGATIONS)}')
+    arrays = df_to_arrays(df)
+    time = arrays.pop("Time")
+    order = None
+    if len(time) > 1 and (np.diff(time) < 0).any():
+        order = np.argsort(time, kind="stable")
+        time = time[order]
+
+    group_ns = int(group) * 1_000_000_000
+    buckets = time // group_ns
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[:1] - 1)) if len(buckets) else np.empty(0, dtype=np.int64)
+
+    result = {"Time": pd.to_datetime(buckets[starts] * group_ns, utc=True)}
+    if df["Time"].dtype == object:
+        result["Time"] = result["Time"].strftime(ISO_TIME_FORMAT)
+    for column, values in arrays.items():
+        if order is not None:
+            values = values[order]
+        result[column] = reduce_buckets(values, starts, aggregation)
+    return pd.DataFrame(result, columns=list(df.columns))
+
+
+def reduce_buckets(values: np.ndarray, starts: np.ndarray, aggregation: str) -> np.ndarray:
+    '''
+        Aggregates consecutive runs of values starting at the indexes in starts, NaN values are ignored.
+        Object values are not aggregated, the first value of every run is returned.
+    '''
+    if not len(starts):
+        return np.empty(0, dtype=np.int64 if aggregation == "count" else values.dtype)
+    valid = ~pd.isna(values)
+    if aggregation == "count":
+        return np.add.reduceat(valid.astype(np.int64), starts)
+    if values.dtype == object:
+        return values[starts]
+    if aggregation == "min":
+        return np.fmin.reduceat(values, starts)
+    if aggregation == "max":
+        return np.fmax.reduceat(values, starts)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    sums = np.add.reduceat(np.where(valid, values, 0), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+class Rollup_pyramid():
+    '''
+        Normalization result at its finest resolution with cached rollups to coarser resolutions,
+        so zooming out is served without new queries or calculations.
+    '''
+    def __init__(self, df: pd.DataFrame, group: int) -> None:
+        """
+            Parameters:
+                df: pd.DataFrame
+                    a result of get_normalization
+                group: int
+                    resolution of df in seconds, rollups must be a multiple of it
+        """
+        self.df = df
+        self.group = group
+        self._rollups: Dict[Tuple[int, str], pd.DataFrame] = {}
+
+    def get(self, group: int, aggregation: str = "mean") -> pd.DataFrame:
+        '''
+            Returns the rollup of the result to group seconds, computed on first use.
+            Raises:
+                ValueError
+                    Iff group is not a multiple of the resolution of the result.
+        '''
+        if group % self.group:
+            raise ValueError(f'rollup group {group}s is not a multiple of the result group {self.group}s')
+        key = (group, aggregation)
+        if key not in self._rollups:
+            self._rollups[key] = rollup(self.df, group, aggregation)
+        return self._rollups[key]
+
+    def levels(self) -> Dict[Tuple[int, str], int]:
+        '''
+            Returns the rows of every cached rollup by (group, aggregation).
+        '''
+        return {key: len(df) for key, df in self._rollups.items()}
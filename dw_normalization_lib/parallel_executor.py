@@ -0,0 +1,174 @@
+import pandas as pd
+import numpy as np
+import logging
+import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, List, Dict, Union, Optional
+
+from dw_timeseries_lib import Db_client
+
+from dw_normalization_lib.normalization_client import Normalization_client
+from dw_normalization_lib.constants import Supported_calculation_engines
+from dw_normalization_lib.objects.normalization_config import Normalization_config
+from dw_normalization_lib.objects.result_buffer import df_to_arrays
+from dw_normalization_lib.errors import Empty_timeseries_result, No_timeseries_data_found
+
+log = logging.getLogger(__name__)
+
+# timeseries client of the worker process, created by _init_worker
+_worker_timeseries_client: Union[Db_client, None] = None
+
+
+@dataclass
+class Job_failure:
+    '''
+        A normalization job, or a time chunk of it, that failed.
+    '''
+    index: int
+    id: str
+    systemId: str
+    start_datetime: datetime.datetime
+    end_datetime: datetime.datetime
+    error: Exception
+
+
+@dataclass
+class Parallel_result:
+    '''
+        results: the normalization result per config, in the order of the configs, in the format of
+            Normalization_client.get_normalization. None if every chunk of the config failed or had no rows
+        failures: the failed jobs
+    '''
+    results: List[Union[pd.DataFrame, None]] = field(default_factory=list)
+    failures: List[Job_failure] = field(default_factory=list)
+
+
+def _init_worker(timeseries_client_factory: Callable[[], Db_client]):
+    global _worker_timeseries_client
+    _worker_timeseries_client = timeseries_client_factory()
+
+
+def _run_job(
+    config: Normalization_config,
+    baseline: Dict[str, float],
+    tags: Union[List[str], None],
+    engine: Supported_calculation_engines
+) -> Union[Dict[str, np.ndarray], None]:
+    '''
+        Returns the columns of the result as arrays, see df_to_arrays, Time as returned by the timeseries db.
+    '''
+    client = Normalization_client(_worker_timeseries_client, config, engine=engine)
+    client.add_baseline(baseline)
+    client.tags = tags
+    df = client.get_normalization()
+    if df is None:
+        return None
+    arrays = df_to_arrays(df)
+    arrays["Time"] = df["Time"].to_numpy()
+    return arrays
+
+
+class Parallel_executor:
+    timeseries_client_factory: Callable[[], Db_client]
+    max_workers: Union[int, None] = None
+    engine: Supported_calculation_engines
+
+    def __init__(
+        self,
+        timeseries_client_factory: Callable[[], Db_client],
+        max_workers: Optional[int] = None,
+        engine: Supported_calculation_engines = Supported_calculation_engines.VECTORIZED,
+        mp_context=None
+    ) -> None:
+        """
+            Runs normalization jobs on a pool of worker processes.
+            Parameters:
+                timeseries_client_factory: Callable[[], Db_client]
+                    picklable callable creating the Db_client of a worker process, called once per worker
+                max_workers: Optional[int] = None
+                    number of worker processes, defaults to the number of processors
+                engine: Supported_calculation_engines
+                    calculation engine used by the workers
+                mp_context
+                    multiprocessing context passed to the ProcessPoolExecutor
+        """
+        self.timeseries_client_factory = timeseries_client_factory
+        self.max_workers = max_workers
+        self.engine = engine
+        self.mp_context = mp_context
+
+    def run(
+        self,
+        configs: List[Normalization_config],
+        baselines: List[Dict[str, float]],
+        tags: Optional[List[str]] = None,
+        chunk: Optional[datetime.timedelta] = None
+    ) -> Parallel_result:
+        '''
+            Normalizes every config against its baseline on the worker processes.
+            Parameters:
+                configs: List[Normalization_config]
+                baselines: List[Dict[str, float]]
+                    the baseline of each config, in the same order as configs
+                tags: Optional[List[str]] = None
+                    additional system tags returned with every result
+                chunk: Optional[datetime.timedelta] = None
+                    if passed, every config is split into time windows of chunk length which run as separate jobs
+            Returns:
+                Parallel_result
+                    ordered results and the failed jobs, a failing job does not stop the other jobs
+        '''
+        if len(configs) != len(baselines):
+            raise ValueError(f'{len(configs)} configs were passed with {len(baselines)} baselines')
+
+        jobs = []
+        for index, config in enumerate(configs):
+            windows = config.split(chunk) if chunk else [config]
+            for window in windows:
+                jobs.append((index, window))
+
+        chunks: List[List[Dict[str, np.ndarray]]] = [[] for _ in configs]
+        failures = []
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self.mp_context,
+            initializer=_init_worker,
+            initargs=(self.timeseries_client_factory,)
+        ) as executor:
+            futures = {
+                executor.submit(_run_job, window, baselines[index], tags, self.engine): (index, position, window)
+                for position, (index, window) in enumerate(jobs)
+            }
+            arrays_by_position = {}
+            for future in as_completed(futures):
+                index, position, window = futures[future]
+                try:
+                    arrays_by_position[position] = future.result()
+                except (Empty_timeseries_result, No_timeseries_data_found) as err:
+                    log.warning(f'no data for system {window.systemId} from {window.start_datetime} to {window.end_datetime}')
+                    failures.append(Job_failure(
+                        index, window.id, window.systemId, window.start_datetime, window.end_datetime, err))
+                except Exception as err:
+                    log.exception(f'normalization failed for system {window.systemId}')
+                    failures.append(Job_failure(
+                        index, window.id, window.systemId, window.start_datetime, window.end_datetime, err))
+
+        for position, (index, _) in enumerate(jobs):
+            result = arrays_by_position.get(position)
+            if result is not None:
+                chunks[index].append(result)
+
+        results = []
+        for config_chunks in chunks:
+            if not config_chunks:
+                results.append(None)
+                continue
+            # the chunks are split on bucket boundaries, see split_time_window, no row is returned twice
+            results.append(pd.DataFrame({
+                column: np.concatenate([arrays[column] for arrays in config_chunks])
+                for column in config_chunks[0]
+            }))
+
+        failures.sort(key=lambda failure: (failure.index, failure.start_datetime))
+        return Parallel_result(results, failures)
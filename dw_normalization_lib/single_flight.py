@@ -0,0 +1,190 @@
+import json
+import time
+import asyncio
+import logging
+import datetime
+import threading
+import dataclasses
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from typing import Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from dw_normalization_lib.constants import Supported_Normalized_calcs
+from dw_normalization_lib.normalization_client import Normalization_client
+from dw_normalization_lib.objects.normalization_request import Normalization_request
+
+log = logging.getLogger(__name__)
+
+Normalization_key = Tuple[str, str]
+
+
+def _timestamp(timestamp: datetime.datetime) -> str:
+    # aware timestamps are compared in UTC, naive ones as they are
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc)
+    return timestamp.isoformat()
+
+
+def _baseline(baseline) -> Union[str, list, dict]:
+    if isinstance(baseline, datetime.datetime):
+        return _timestamp(baseline)
+    if isinstance(baseline, list):
+        return [[_timestamp(item.timestamp), _baseline(dict(item))] for item in baseline]
+    return {tag: None if val is None else float(val) for tag, val in sorted(baseline.items())}
+
+
+def normalization_key(request: Normalization_request, engine=None) -> Normalization_key:
+    '''
+        Returns the canonical key of a request: the systemId and a JSON string of everything else the result depends on,
+        the time window, group, calculations, mapping, filters, baseline, tags and engine.
+        Two requests with the same key have the same result, whichever objects they were built from.
+    '''
+    config = request.config
+    key = {
+        "group": int(config.group),
+        "start_datetime": _timestamp(config.start_datetime),
+        "end_datetime": _timestamp(config.end_datetime),
+        "calculations": [
+            tag.value if isinstance(tag, Supported_Normalized_calcs) else tag for tag in config.tags
+        ],
+        "mapping": dict(config.mapping),
+        "filters": {name: float(val) for name, val in dataclasses.asdict(config.filters).items()},
+        "baseline": _baseline(request.baseline),
+        "tags": list(request.tags) if request.tags else None,
+        "nan_as_none": request.nan_as_none,
+        "engine": getattr(engine, "value", engine),
+    }
+    return (config.systemId, json.dumps(key, sort_keys=True, default=str))
+
+
+class Single_flight_client:
+    '''
+        Coalesces identical normalization requests in front of a Normalization_client.
+        Requests with the same normalization_key that are in flight at the same time are computed once,
+        every caller, thread or asyncio task, receives the result of that single computation.
+        With a ttl the results are also kept for ttl seconds after they are computed.
+        A failed computation raises its exception to every waiter and is not kept.
+        Counters:
+            hits: results served from the ttl cache
+            coalesced: calls which waited for an identical request in flight
+            misses: calls which computed the result
+    '''
+    def __init__(
+        self,
+        normalization_client: Normalization_client,
+        ttl: float = 0,
+        max_size: int = 256,
+        copy: bool = True
+    ) -> None:
+        """
+            Parameters:
+                normalization_client: Normalization_client
+                    the client the requests are computed with, see Normalization_client.normalize
+                ttl: float = 0
+                    seconds a result is kept after it is computed, results are only shared while in flight if 0
+                max_size: int = 256
+                    maximal number of kept results, the oldest are dropped first
+                copy: bool = True
+                    return a copy of the shared result to every caller, if False all callers receive the same
+                    DataFrame which must not be modified
+        """
+        self.normalization_client = normalization_client
+        self.ttl = ttl
+        self.max_size = max_size
+        self.copy = copy
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self._in_flight: Dict[Normalization_key, Future] = {}
+        self._results: "OrderedDict[Normalization_key, Tuple[float, Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def normalize(self, request: Normalization_request) -> Union[pd.DataFrame, None]:
+        '''
+            Same as Normalization_client.normalize, identical concurrent requests are computed once.
+        '''
+        key = normalization_key(request, self.normalization_client.engine)
+        future, owner = self.__future(key)
+        if owner:
+            self.__compute(key, future, request)
+        return self.__result(future.result())
+
+    async def normalize_async(
+        self, request: Normalization_request, executor: Optional[Executor] = None
+    ) -> Union[pd.DataFrame, None]:
+        '''
+            asyncio version of normalize, the computation runs on executor, the loop's default executor if None.
+            Tasks and threads requesting the same key share the same computation.
+        '''
+        key = normalization_key(request, self.normalization_client.engine)
+        future, owner = self.__future(key)
+        if owner:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(executor, self.__compute, key, future, request)
+        return self.__result(await asyncio.wrap_future(future))
+
+    def invalidate(self, systemId: Optional[str] = None):
+        '''
+            Removes the kept results of systemId, or every kept result if systemId is None.
+            Requests in flight are not affected.
+        '''
+        with self._lock:
+            if systemId is None:
+                self._results.clear()
+            else:
+                for key in [key for key in self._results if key[0] == systemId]:
+                    del self._results[key]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "in_flight": len(self._in_flight),
+            "size": len(self._results)
+        }
+
+    def __future(self, key: Normalization_key) -> Tuple[Future, bool]:
+        '''
+            Returns the future of key and whether the caller owns it and has to compute it.
+        '''
+        with self._lock:
+            if key in self._results:
+                expires, future = self._results[key]
+                if expires > time.monotonic():
+                    self._results.move_to_end(key)
+                    self.hits += 1
+                    return future, False
+                del self._results[key]
+            if key in self._in_flight:
+                self.coalesced += 1
+                return self._in_flight[key], False
+            future = Future()
+            self._in_flight[key] = future
+            self.misses += 1
+            return future, True
+
+    def __compute(self, key: Normalization_key, future: Future, request: Normalization_request):
+        try:
+            result = self.normalization_client.normalize(request)
+        except BaseException as error:
+            log.debug(f'normalization of system {key[0]} failed, the error is raised to every waiter')
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(error)
+            return
+        with self._lock:
+            del self._in_flight[key]
+            if self.ttl > 0:
+                self._results[key] = (time.monotonic() + self.ttl, future)
+                while len(self._results) > self.max_size:
+                    self._results.popitem(last=False)
+        future.set_result(result)
+
+    def __result(self, df: Union[pd.DataFrame, None]) -> Union[pd.DataFrame, None]:
+        if self.copy and df is not None:
+            return df.copy()
+        return df
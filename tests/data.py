@@ -0,0 +1,60 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from dw_normalization_lib.constants import LibConstants
+
+
+def system_data(
+    start: datetime.datetime,
+    rows: int,
+    group: int = LibConstants.DEFAULT_GROUP,
+    seed: int = 0,
+    gap_probability: float = 0.0
+) -> pd.DataFrame:
+    '''
+        Small raw data generator for the tests, one sample per group seconds for every tag in LibConstants.BASELINE_TAGS.
+        The values follow 25 minute closed circuit cycles with noise, TT1 crosses 25 °C.
+        gap_probability is the probability per sample and tag of a missing value.
+        Returns:
+            pd.DataFrame
+                Time as UTC timestamps and one float column per tag
+    '''
+    rng = np.random.default_rng(seed)
+    seconds = np.arange(rows, dtype=np.int64) * group
+    progress = (seconds % 1_680) / 1_680
+    cc = progress < 0.9
+
+    def noise(scale):
+        return rng.normal(0, scale, rows)
+
+    cit2 = np.where(cc, 2 + 14 * progress, 1.5) + noise(0.2)
+    fit1 = np.where(cc, 100, 130) + noise(1.5)
+    pt2 = 120 + 6 * cit2 + noise(2)
+    pt3 = pt2 - 8 + noise(0.5)
+    data = {
+        "AIT1": 7.2 + noise(0.05),
+        "CIT1": 1_000 + noise(10),
+        "CIT2": cit2,
+        "CIT3": 15 + 10 * progress + noise(1),
+        "FIT1": fit1,
+        "FIT2": 30 + noise(1),
+        "FIT3": fit1 * np.where(cc, 0.97, 0.6) + noise(0.5),
+        "Last_CCD_VR": np.where(cc, 40 + 52 * progress, 5) + noise(0.5),
+        "M_DP": pt2 - pt3,
+        "PT2": pt2,
+        "PT3": pt3,
+        "PT7": 10 + noise(0.3),
+        "TT1": 75 + 10 * np.sin(2 * np.pi * seconds / 86_400) + noise(0.3),
+        LibConstants.FILTER_RECOVERY: np.full(rows, 90.0),
+    }
+
+    time = pd.Timestamp(start)
+    time = time.tz_localize("UTC") if time.tzinfo is None else time.tz_convert("UTC")
+    df = pd.DataFrame({"Time": time + pd.to_timedelta(seconds, unit="s")})
+    for tag in LibConstants.BASELINE_TAGS:
+        values = data[tag]
+        values[rng.random(rows) < gap_probability] = np.nan
+        df[tag] = values
+    return df
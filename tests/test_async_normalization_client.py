@@ -0,0 +1,50 @@
+import asyncio
+import datetime
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dw_timeseries_lib")
+
+from dw_normalization_lib.async_normalization_client import Async_normalization_client
+from dw_normalization_lib.constants import Supported_Normalized_calcs
+from dw_normalization_lib.memory_timeseries_client import Memory_db_client
+from dw_normalization_lib.objects.normalization_config import Normalization_config
+from tests.data import system_data
+
+START = datetime.datetime(2022, 1, 1)
+
+
+class Slow_db_client(Memory_db_client):
+    '''
+        Blocking client recording the peak number of get_data calls in flight.
+    '''
+    def __init__(self, data, latency):
+        super().__init__(data)
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get_data(self, measurements):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            return super().get_data(measurements)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def test_blocking_client_reaches_max_concurrency():
+    timeseries_client = Slow_db_client({"system": system_data(START, 500)}, latency=0.2)
+    client = Async_normalization_client(timeseries_client, max_concurrency=40)
+    config = Normalization_config(
+        1, "system", 10, START, START + datetime.timedelta(hours=1), [Supported_Normalized_calcs.DIFFERENTIAL_PRESSURE])
+    results = asyncio.run(client.get_normalization_many([config] * 60, [START + datetime.timedelta(minutes=30)] * 60))
+    assert all(result is not None for result in results)
+    # not capped by the workers of the loop's default executor
+    assert timeseries_client.peak == 40
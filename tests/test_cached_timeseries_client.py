@@ -0,0 +1,87 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("dw_timeseries_lib")
+pytest.importorskip("pyarrow")
+
+from dw_timeseries_lib import Measurement, Tag
+
+from dw_normalization_lib.cached_timeseries_client import Cached_db_client
+from dw_normalization_lib.memory_timeseries_client import Memory_db_client
+from tests.data import system_data
+
+START = datetime.datetime(2022, 1, 1)
+TAGS = ["FIT1", "PT2"]
+
+
+@pytest.fixture(scope="module")
+def timeseries_client():
+    return Memory_db_client({"system": system_data(START, 5_000, seed=2)})
+
+
+def measurement(start, end, tags=TAGS):
+    return Measurement("normalization", "system", {tag: Tag(tag, tag) for tag in tags}, 10, start, end)
+
+
+def get_df(client, start, end, tags=TAGS):
+    return client.get_data([measurement(start, end, tags)])[0].data.reset_index(drop=True)
+
+
+def test_cached_matches_uncached_off_the_group_grid(timeseries_client, tmp_path):
+    client = Cached_db_client(timeseries_client, str(tmp_path), chunk=datetime.timedelta(hours=2))
+    # off the 10 s grid, the bucket containing the start is returned by both clients
+    start, end = START + datetime.timedelta(minutes=50, seconds=5), START + datetime.timedelta(hours=5, seconds=5)
+    expected = get_df(timeseries_client, start, end)
+    for _ in range(2):
+        df = get_df(client, start, end)
+        assert df["Time"].equals(expected["Time"])
+        # the cached leading bucket holds the whole bucket, the wrapped client only the samples after start
+        pd.testing.assert_frame_equal(df.iloc[1:], expected.iloc[1:])
+    assert client.hits > 0 and client.misses > 0
+
+
+def test_chunks_do_not_depend_on_the_request(timeseries_client, tmp_path):
+    client = Cached_db_client(timeseries_client, str(tmp_path), chunk=datetime.timedelta(days=2))
+    get_df(client, START + datetime.timedelta(hours=1), START + datetime.timedelta(hours=3))
+    files = sorted(os.listdir(tmp_path))
+    # 2022-01-01 is the second day of a two day chunk since the epoch, a request on the day before shares its files
+    get_df(client, START - datetime.timedelta(hours=23), START - datetime.timedelta(hours=21))
+    assert sorted(os.listdir(tmp_path)) == files
+    assert client.hits == len(TAGS)
+
+
+class Omitting_db_client(Memory_db_client):
+    '''
+        Returns no column for the tags without data, like the timeseries db.
+    '''
+    def get_data(self, measurements):
+        for measurement in super().get_data(measurements):
+            measurement.data = measurement.data.dropna(axis=1, how="all")
+        return measurements
+
+
+def test_tag_missing_from_the_db(tmp_path):
+    timeseries_client = Omitting_db_client({"system": system_data(START, 1_000)})
+    client = Cached_db_client(timeseries_client, str(tmp_path), chunk=datetime.timedelta(hours=1))
+    df = get_df(client, START, START + datetime.timedelta(hours=2), TAGS + ["UNKNOWN"])
+    assert df["UNKNOWN"].isna().all()
+    assert df[TAGS].notna().all().all()
+
+
+def test_evicted_chunk_is_fetched_again(timeseries_client, tmp_path):
+    client = Cached_db_client(timeseries_client, str(tmp_path), chunk=datetime.timedelta(hours=1))
+    start, end = START, START + datetime.timedelta(hours=2)
+    expected = get_df(client, start, end)
+    # a chunk file removed between the freshness check and the read
+    read = client._Cached_db_client__read
+
+    def read_after_eviction(path):
+        if os.path.exists(path):
+            os.remove(path)
+        return read(path)
+
+    client._Cached_db_client__read = read_after_eviction
+    pd.testing.assert_frame_equal(get_df(client, start, end), expected)
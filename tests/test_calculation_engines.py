@@ -0,0 +1,111 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dw_normalization_lib.constants import Supported_Normalized_calcs
+from dw_normalization_lib.normalization_calculation import (
+    CALCULATION_GRAPH,
+    Calculation_plan,
+    Fused_normalized_calculations,
+    Normalized_calculations,
+    Vectorized_normalized_calculations,
+)
+from dw_normalization_lib.normalization_calculation.fused_calculations import FUSED_ATOL, FUSED_RTOL
+from dw_normalization_lib.normalization_calculation.vectorized_calculations import VECTORIZED_ATOL, VECTORIZED_RTOL
+from tests.data import system_data
+
+OUTPUTS = [calculation.value for calculation in Supported_Normalized_calcs if calculation.value in CALCULATION_GRAPH]
+# rows hitting the IFERROR branches: divisions by zero and missing values
+EDGE_ROWS = (
+    {"FIT3": 0.0},
+    {"CIT1": 0.0, "CIT2": 0.0},
+    {"PT2": 0.0, "PT3": 0.0, "PT7": 0.0},
+    {"TT1": np.nan},
+    {"FIT1": 0.0, "FIT2": 0.0, "FIT3": 0.0},
+    {"CIT3": 0.0},
+    {"FIT1": np.nan, "CIT2": np.nan},
+)
+
+
+@pytest.fixture(scope="module")
+def raw_df():
+    df = system_data(datetime.datetime(2022, 1, 1), 1000, seed=3, gap_probability=0.01)
+    # Time as ISO strings like the timeseries db, the row-wise engine then evaluates the rows on python floats
+    df["Time"] = df["Time"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+    for row, values in enumerate(EDGE_ROWS):
+        for tag, value in values.items():
+            df.loc[row, tag] = value
+    return df
+
+
+@pytest.fixture(scope="module")
+def baseline_df(raw_df):
+    # the baseline frame of Normalization_client has no Time column
+    return raw_df.iloc[[100]].drop(columns="Time").reset_index(drop=True)
+
+
+def calculate(plan, engine, df, baseline_df):
+    baseline = plan.baseline_values(baseline_df, engine())
+    return plan.execute(df.copy(), engine(), baseline)
+
+
+def assert_columns_close(actual, expected, columns, rtol, atol):
+    for column in columns:
+        np.testing.assert_allclose(
+            actual[column].to_numpy(dtype=float),
+            expected[column].to_numpy(dtype=float),
+            rtol=rtol,
+            atol=atol,
+            equal_nan=True,
+            err_msg=column
+        )
+
+
+def test_vectorized_matches_row_wise(raw_df, baseline_df):
+    plan = Calculation_plan(OUTPUTS)
+    row_wise = calculate(plan, Normalized_calculations, raw_df, baseline_df)
+    vectorized = calculate(plan, Vectorized_normalized_calculations, raw_df, baseline_df)
+    assert_columns_close(vectorized, row_wise, plan.columns, VECTORIZED_RTOL, VECTORIZED_ATOL)
+
+
+def test_fused_matches_vectorized(raw_df, baseline_df):
+    pytest.importorskip("numba")
+    plan = Calculation_plan(OUTPUTS)
+    vectorized = calculate(plan, Vectorized_normalized_calculations, raw_df, baseline_df)
+    fused = calculate(plan, Fused_normalized_calculations, raw_df, baseline_df)
+    # only the outputs are stored by the fused kernel
+    assert [column for column in fused if column not in raw_df] == plan.outputs
+    assert_columns_close(fused, vectorized, plan.outputs, FUSED_RTOL, FUSED_ATOL)
+
+
+@pytest.mark.parametrize("engine", [Normalized_calculations, Vectorized_normalized_calculations])
+def test_plan_matches_single_calculations(raw_df, baseline_df, engine):
+    combined = calculate(Calculation_plan(OUTPUTS), engine, raw_df, baseline_df)
+    for output in OUTPUTS:
+        single = calculate(Calculation_plan([output]), engine, raw_df, baseline_df)
+        pd.testing.assert_series_equal(combined[output], single[output], check_dtype=False)
+
+
+@pytest.mark.parametrize("engine", [Normalized_calculations, Vectorized_normalized_calculations])
+def test_baseline_values_match_baseline_row(raw_df, baseline_df, engine):
+    plan = Calculation_plan(OUTPUTS)
+    with_values = calculate(plan, engine, raw_df, baseline_df)
+    # the baseline as the last row of the frame, the original calling convention
+    with_row = plan.execute(pd.concat([raw_df, baseline_df], ignore_index=True), engine())
+    for output in OUTPUTS:
+        np.testing.assert_array_equal(
+            with_values[output].to_numpy(dtype=float), with_row[output].to_numpy(dtype=float)[:-1], err_msg=output
+        )
+
+
+def test_free_intermediates(raw_df, baseline_df):
+    plan = Calculation_plan(OUTPUTS)
+    lean_plan = Calculation_plan(OUTPUTS, free_intermediates=True)
+    full = calculate(plan, Vectorized_normalized_calculations, raw_df, baseline_df)
+    lean = calculate(lean_plan, Vectorized_normalized_calculations, raw_df, baseline_df)
+    assert list(lean.columns) == list(raw_df.columns) + [
+        column for column in plan.columns if column in plan.outputs
+    ]
+    pd.testing.assert_frame_equal(lean[plan.outputs], full[plan.outputs])
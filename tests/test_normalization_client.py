@@ -0,0 +1,109 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("dw_timeseries_lib")
+
+from dw_normalization_lib.constants import Supported_Normalized_calcs, Supported_calculation_engines
+from dw_normalization_lib.intermediate_cache import Intermediate_cache
+from dw_normalization_lib.memory_timeseries_client import Memory_db_client
+from dw_normalization_lib.normalization_calculation import CALCULATION_GRAPH
+from dw_normalization_lib.normalization_client import Normalization_client
+from dw_normalization_lib.objects.baseline import Baseline
+from dw_normalization_lib.objects.filters import Filters
+from dw_normalization_lib.objects.normalization_config import Normalization_config
+from tests.data import system_data
+
+START = datetime.datetime(2022, 1, 1)
+CALCULATIONS = [calculation for calculation in Supported_Normalized_calcs if calculation.value in CALCULATION_GRAPH]
+OUTPUTS = [calculation.value for calculation in CALCULATIONS]
+
+
+@pytest.fixture(scope="module")
+def timeseries_client():
+    return Memory_db_client({"system": system_data(START, 2_000, seed=1, gap_probability=0.01)})
+
+
+def normalization_client(timeseries_client, filters=None, start=START, hours=5, tags=None, **kwargs):
+    config = Normalization_config(
+        1, "system", 10, start, start + datetime.timedelta(hours=hours), CALCULATIONS, filters=filters)
+    client = Normalization_client(timeseries_client, config, **kwargs)
+    client.add_baseline(client.baseline_from_timestamp(START + datetime.timedelta(hours=1)))
+    client.tags = tags
+    return client
+
+
+def test_filtered_rows_have_no_normalized_values(timeseries_client):
+    filters = Filters(feed_flow_low=105)
+    unfiltered = normalization_client(timeseries_client, tags=["FIT1"]).get_normalization()
+    filtered = normalization_client(timeseries_client, filters, tags=["FIT1"]).get_normalization()
+
+    rejected = (unfiltered["FIT1"] < 105).to_numpy()
+    assert rejected.any() and not rejected.all()
+    # the rows are kept with their Time and additional tags
+    assert filtered["Time"].equals(unfiltered["Time"])
+    assert filtered["FIT1"].equals(unfiltered["FIT1"])
+    # rejected rows are NaN, not the IFERROR values of NaN inputs
+    assert filtered.loc[rejected, OUTPUTS].isna().all().all()
+    assert filtered.loc[~rejected, OUTPUTS].equals(unfiltered.loc[~rejected, OUTPUTS])
+
+
+def test_chunks_match_the_whole_window_off_the_group_grid(timeseries_client):
+    # 5 s off the 10 s bucket grid, the chunk boundaries must not split a bucket
+    client = normalization_client(timeseries_client, start=START + datetime.timedelta(seconds=5), hours=2)
+    whole = client.get_normalization()
+    chunks = pd.concat(list(client.iter_normalization(datetime.timedelta(minutes=30))), ignore_index=True)
+    assert chunks["Time"].is_unique
+    pd.testing.assert_frame_equal(chunks, whole.reset_index(drop=True))
+
+
+def test_baseline_schedule_switches_at_the_period_boundary(timeseries_client):
+    switch = START + datetime.timedelta(hours=2, minutes=30)
+    first = normalization_client(timeseries_client)
+    second = normalization_client(timeseries_client)
+    second_baseline = second.baseline_from_timestamp(START + datetime.timedelta(hours=4))
+    second.add_baseline(second_baseline)
+    client = normalization_client(timeseries_client)
+    # in any order, rows before the first period use the first baseline
+    client.add_baseline_schedule([
+        Baseline(second_baseline, switch),
+        client.baseline_from_timestamp(START + datetime.timedelta(hours=1)),
+    ])
+
+    df = client.get_normalization()
+    before = (pd.to_datetime(df["Time"], utc=True) < pd.Timestamp(switch, tz="UTC")).to_numpy()
+    assert before.any() and not before.all()
+    pd.testing.assert_frame_equal(df[before], first.get_normalization()[before])
+    pd.testing.assert_frame_equal(df[~before], second.get_normalization()[~before])
+
+
+def test_filter_scenarios_match_get_normalization(timeseries_client):
+    filters = [Filters(), Filters(feed_flow_low=105), Filters(reject_conductivity_high=10, recovery_low=50)]
+    scenarios = normalization_client(timeseries_client, tags=["FIT1"]).get_filter_scenarios(filters)
+    for i, scenario_filters in enumerate(filters):
+        expected = normalization_client(timeseries_client, scenario_filters, tags=["FIT1"]).get_normalization()
+        pd.testing.assert_frame_equal(scenarios.scenario(i), expected.reset_index(drop=True))
+        assert scenarios.summary().loc[(i, OUTPUTS[0]), "count"] == expected[OUTPUTS[0]].count()
+
+
+@pytest.mark.parametrize("engine", [Supported_calculation_engines.VECTORIZED, Supported_calculation_engines.FUSED])
+def test_intermediate_cache_hit_matches_a_fresh_computation(engine):
+    if engine == Supported_calculation_engines.FUSED:
+        pytest.importorskip("numba")
+    timeseries_client = Memory_db_client({"system": system_data(START, 2_000, seed=1, gap_probability=0.01)})
+    cache = Intermediate_cache()
+    filters = Filters(feed_flow_low=105)
+    normalization_client(timeseries_client, filters, engine=engine, intermediate_cache=cache).get_normalization()
+
+    client = normalization_client(timeseries_client, filters, engine=engine, intermediate_cache=cache)
+    baseline = client.baseline_from_timestamp(START + datetime.timedelta(hours=4))
+    client.add_baseline(baseline)
+    calls = timeseries_client.calls
+    cached = client.get_normalization()
+    assert cache.stats["hits"] == 1 and timeseries_client.calls == calls
+
+    fresh = normalization_client(timeseries_client, filters, engine=engine)
+    fresh.add_baseline(baseline)
+    pd.testing.assert_frame_equal(cached, fresh.get_normalization())
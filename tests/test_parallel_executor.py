@@ -0,0 +1,51 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("dw_timeseries_lib")
+
+from dw_normalization_lib.constants import Supported_Normalized_calcs
+from dw_normalization_lib.memory_timeseries_client import Memory_db_client
+from dw_normalization_lib.normalization_client import Normalization_client
+from dw_normalization_lib.objects.normalization_config import Normalization_config
+from dw_normalization_lib.parallel_executor import Parallel_executor
+from tests.data import system_data
+
+START = datetime.datetime(2022, 1, 1)
+SYSTEMS = ("system_1", "system_2")
+
+
+def timeseries_client():
+    # module level, the factory is pickled to the worker processes
+    return Memory_db_client({
+        systemId: system_data(START, 1_000, seed=seed, gap_probability=0.01) for seed, systemId in enumerate(SYSTEMS)
+    })
+
+
+def test_chunked_parallel_results_match_serial():
+    # 5 s off the bucket grid, chunk boundaries must not return a bucket twice
+    start = START + datetime.timedelta(seconds=5)
+    configs = [
+        Normalization_config(
+            i, systemId, 10, start, start + datetime.timedelta(hours=2),
+            [Supported_Normalized_calcs.FLUX, Supported_Normalized_calcs.PERMEATE_TDS]
+        )
+        for i, systemId in enumerate(SYSTEMS)
+    ]
+    serial = []
+    baselines = []
+    for config in configs:
+        client = Normalization_client(timeseries_client(), config)
+        baselines.append(client.baseline_from_timestamp(START + datetime.timedelta(hours=1)))
+        client.add_baseline(baselines[-1])
+        client.tags = ["AIT1"]
+        serial.append(client.get_normalization())
+
+    result = Parallel_executor(timeseries_client, max_workers=2).run(
+        configs, baselines, tags=["AIT1"], chunk=datetime.timedelta(minutes=25))
+
+    assert not result.failures
+    for parallel_df, serial_df in zip(result.results, serial):
+        # Time holds the strings returned by the timeseries db
+        pd.testing.assert_frame_equal(parallel_df, serial_df.reset_index(drop=True))
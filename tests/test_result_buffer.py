@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from dw_normalization_lib.objects.result_buffer import Result_buffer, df_to_arrays
+
+
+def result(start, rows):
+    time = pd.date_range(start, periods=rows, freq="10s", tz="UTC")
+    return pd.DataFrame({
+        # not the ISO format of the library, the buffer must return the strings as appended
+        "Time": time.strftime("%Y-%m-%d %H:%M:%S.000+00:00"),
+        "normalized_flux": np.arange(rows, dtype=float),
+        "site": ["a"] * rows,
+    })
+
+
+def test_time_values_and_object_columns_are_kept():
+    first = result("2022-01-01", 6)
+    second = result("2022-01-01 00:00:50", 6)
+    buffer = Result_buffer(list(df_to_arrays(first)), capacity=8)
+    buffer.append(df_to_arrays(first), first["Time"].to_numpy())
+    # replaces the last buffered row and grows the buffer
+    buffer.append(df_to_arrays(second), second["Time"].to_numpy())
+    buffer.evict_before(pd.Timestamp("2022-01-01 00:00:20", tz="UTC").value)
+
+    expected = pd.concat([first.iloc[2:5], second], ignore_index=True)
+    pd.testing.assert_frame_equal(buffer.to_df()[list(expected.columns)], expected)
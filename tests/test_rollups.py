@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dw_normalization_lib.objects.rollups import Rollup_pyramid, rollup
+
+
+@pytest.fixture
+def result_df():
+    # 10 s rows from 00:00:50, the first minute bucket holds a single row
+    return pd.DataFrame({
+        "Time": pd.date_range("2022-01-01 00:00:50", periods=13, freq="10s", tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "Normalized_DP": [1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0],
+        "site": ["a"] * 4 + ["b"] * 9,
+    })
+
+
+def test_rollup_aggregates_epoch_aligned_buckets(result_df):
+    df = rollup(result_df, 60)
+    assert list(df.columns) == list(result_df.columns)
+    assert list(df["Time"]) == ["2022-01-01T00:00:00Z", "2022-01-01T00:01:00Z", "2022-01-01T00:02:00Z"]
+    np.testing.assert_allclose(df["Normalized_DP"], [1.0, (2 + 4 + 5 + 6 + 7) / 5, 10.5])
+    assert list(rollup(result_df, 60, "count")["Normalized_DP"]) == [1, 5, 6]
+
+
+@pytest.mark.parametrize("aggregation", ["mean", "min", "max"])
+def test_rollup_keeps_the_first_value_of_object_columns(result_df, aggregation):
+    df = rollup(result_df, 60, aggregation)
+    assert list(df["site"]) == ["a", "a", "b"]
+    assert list(rollup(result_df, 60, "count")["site"]) == [1, 6, 6]
+
+
+def test_pyramid_requires_a_multiple_of_the_group(result_df):
+    pyramid = Rollup_pyramid(result_df, 10)
+    pd.testing.assert_frame_equal(pyramid.get(60), rollup(result_df, 60))
+    assert pyramid.levels() == {(60, "mean"): 3}
+    with pytest.raises(ValueError):
+        pyramid.get(45)
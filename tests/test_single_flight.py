@@ -0,0 +1,59 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("dw_timeseries_lib")
+
+from dw_normalization_lib.constants import Supported_Normalized_calcs
+from dw_normalization_lib.memory_timeseries_client import Memory_db_client
+from dw_normalization_lib.normalization_client import Normalization_client
+from dw_normalization_lib.objects.normalization_config import Normalization_config
+from dw_normalization_lib.objects.normalization_request import Normalization_request
+from dw_normalization_lib.single_flight import Single_flight_client
+from tests.data import system_data
+
+START = datetime.datetime(2022, 1, 1)
+
+
+class Slow_db_client(Memory_db_client):
+    '''
+        Keeps every request in flight for latency seconds.
+    '''
+    def __init__(self, data, latency):
+        super().__init__(data)
+        self.latency = latency
+
+    def get_data(self, measurements):
+        time.sleep(self.latency)
+        return super().get_data(measurements)
+
+
+def test_concurrent_identical_requests_are_computed_once():
+    timeseries_client = Slow_db_client({"system": system_data(START, 1_000)}, latency=0.2)
+    config = Normalization_config(
+        1, "system", 10, START, START + datetime.timedelta(hours=2), [Supported_Normalized_calcs.DIFFERENTIAL_PRESSURE])
+    request = Normalization_request(config, START + datetime.timedelta(hours=1))
+    expected = Normalization_client(timeseries_client, None).normalize(request)
+    calls = timeseries_client.calls
+
+    client = Single_flight_client(Normalization_client(timeseries_client, None))
+    barrier = threading.Barrier(8)
+
+    def normalize(_):
+        barrier.wait()
+        return client.normalize(request)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(normalize, range(8)))
+
+    assert client.stats["misses"] == 1 and client.stats["coalesced"] == 7
+    # one baseline and one normalization query
+    assert timeseries_client.calls - calls == 2
+    for result in results:
+        pd.testing.assert_frame_equal(result, expected)
+    # every caller receives its own copy
+    assert len({id(result) for result in results}) == 8
@@ -0,0 +1,62 @@
+import datetime
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("dw_timeseries_lib")
+
+from dw_normalization_lib import (
+    Baseline_cache, Filters, Memory_db_client, Normalization_client, Normalization_config, Normalization_request,
+    Supported_Normalized_calcs
+)
+from dw_normalization_lib.normalization_calculation import CALCULATION_GRAPH
+from tests.data import system_data
+
+START = datetime.datetime(2022, 1, 1)
+GROUP = 10
+ROWS = 3_000
+CALCULATIONS = [calculation for calculation in Supported_Normalized_calcs if calculation.value in CALCULATION_GRAPH]
+EXTRA_TAGS = ["AIT1", "M_DP", "PT7"]
+
+
+def random_request(rng, systems):
+    span = ROWS * GROUP
+    start = START + datetime.timedelta(seconds=rng.randrange(0, span // 2, GROUP))
+    end = start + datetime.timedelta(seconds=rng.randrange(GROUP * 100, span // 2, GROUP))
+    config = Normalization_config(
+        1,
+        rng.choice(systems),
+        GROUP,
+        start,
+        end,
+        rng.sample(CALCULATIONS, rng.randint(1, len(CALCULATIONS))),
+        filters=Filters(feed_flow_low=rng.choice([0, 90, 110]), recovery_high=rng.choice([float("inf"), 80]))
+    )
+    baseline = START + datetime.timedelta(seconds=rng.randrange(3600, span - 3600, GROUP))
+    tags = rng.sample(EXTRA_TAGS, rng.randint(0, len(EXTRA_TAGS))) or None
+    return Normalization_request(config, baseline, tags)
+
+
+def test_shared_client_matches_sequential_results():
+    systems = ["system_0", "system_1"]
+    db_client = Memory_db_client({systemId: system_data(START, ROWS, GROUP, seed=i) for i, systemId in enumerate(systems)})
+    rng = random.Random(0)
+    requests = [random_request(rng, systems) for _ in range(12)]
+
+    reference = Normalization_client(db_client, None)
+    expected = [reference.normalize(request) for request in requests]
+
+    # concurrent normalize calls on one client sharing a baseline cache
+    shared = Normalization_client(db_client, None, baseline_cache=Baseline_cache())
+    jobs = list(range(len(requests))) * 3
+    rng.shuffle(jobs)
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda i: shared.normalize(requests[i]), jobs))
+
+    for i, result in zip(jobs, results):
+        if expected[i] is None:
+            assert result is None, i
+        else:
+            assert result.equals(expected[i]), i
+    assert shared.baseline_cache.stats["hits"] > 0